@@ -3,6 +3,9 @@ export interface Document {
   filename: string;
   chunk_count: number;
   upload_date: string;
+  byte_size?: number;
+  embed_model?: string | null;
+  status?: 'processing' | 'ready' | 'error' | 'deleting';
 }
 
 export interface ProcessingStatus {
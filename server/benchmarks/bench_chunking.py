@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Compare recursive and semantic chunking: extra ingest cost against retrieval hit rate.
+
+Builds a synthetic novel of scenes, each on one topic with short dialogue lines
+and two clue sentences, one near each end. A question names both clues; it is a
+hit when one of the top-k chunks holds both, which needs the scene in one piece.
+The default offline embedder needs no Ollama; --embedder ollama uses the real model.
+
+    python benchmarks/bench_chunking.py [--scenes 60] [--chunk-size 1000] [--embedder ollama]
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import re
+import sys
+import time
+
+import numpy as np
+
+# Add the server directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.semantic_chunking import semantic_chunk_document
+from utils.text_processing import chunk_document
+
+TOPICS = {
+    "harbour": "ships sails harbour tide rope anchor gulls dock sailors fish salt waves".split(),
+    "forest": "trees moss path owls ferns roots branches leaves deer shadows stream bark".split(),
+    "kitchen": "bread oven flour kettle soup knives onions pots table steam honey butter".split(),
+    "battle": "swords shields banners horses archers walls gates smoke spears captains drums siege".split(),
+    "library": "books shelves candles scrolls ink dust ladders maps quills pages tomes whispers".split(),
+    "winter": "snow frost ice fire furs sledges wolves hearth blizzard breath cold stars".split(),
+}
+NAMES = "Ada Bram Cora Dov Elin Fenn Gus Hale Ines Jory".split()
+CLUES = "amber cobalt crimson ivory jade ochre saffron scarlet silver umber violet teal".split()
+
+
+def make_corpus(scenes: int, seed: int = 7):
+    """Return (text, questions); each question is (query, (clue sentence 1, clue sentence 2))."""
+    rng = random.Random(seed)
+    paragraphs = []
+    questions = []
+    topic_names = list(TOPICS)
+    previous = None
+    for scene in range(scenes):
+        topic = rng.choice([name for name in topic_names if name != previous])
+        previous = topic
+        words = TOPICS[topic]
+        first, second = f"{rng.choice(CLUES)}{scene}", f"{rng.choice(CLUES)}{scene}x"
+        clue_a = f"The {first} token lay among the {rng.choice(words)} and the {rng.choice(words)}."
+        clue_b = f"Later the {second} mark appeared by the {rng.choice(words)} near the {rng.choice(words)}."
+        lines = [clue_a]
+        for _ in range(rng.randint(4, 12)):
+            if rng.random() < 0.4:
+                lines.append(f'"{rng.choice(["Yes", "No", "Wait", "Look", "Go"])}," said {rng.choice(NAMES)}.')
+            else:
+                picked = " ".join(rng.choice(words) for _ in range(rng.randint(6, 14)))
+                lines.append(f"{rng.choice(NAMES)} watched the {picked}.")
+        lines.append(clue_b)
+        paragraphs.append(" ".join(lines[:len(lines) // 2]))
+        paragraphs.append(" ".join(lines[len(lines) // 2:]))
+        questions.append((f"Where were the {first} token and the {second} mark?", (clue_a, clue_b)))
+    return "\n\n".join(paragraphs), questions
+
+
+TOPIC_OF_WORD = {word: i for i, words in enumerate(TOPICS.values()) for word in words}
+# Template words every scene shares carry no meaning for the offline embedder
+STOPWORDS = set("the and among near by lay later appeared token mark watched said where were yes no wait look go".split())
+
+
+def offline_embed(texts, dims: int = 512):
+    """Stand-in for a sentence-embedding model, deterministic and offline.
+
+    Each content word adds a hashed one-hot component; words of a topic also
+    share that topic's axis, as related words share meaning in a real model.
+    A constant component keeps any two texts slightly similar, as in real models.
+    """
+    vectors = np.zeros((len(texts), dims), dtype=np.float32)
+    vectors[:, -1] = 1.0
+    for row, text in enumerate(texts):
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            if word in STOPWORDS or word.capitalize() in NAMES:
+                continue
+            vectors[row, len(TOPICS) + int(hashlib.md5(word.encode()).hexdigest()[:8], 16) % (dims - len(TOPICS) - 1)] += 1.0
+            if word in TOPIC_OF_WORD:
+                vectors[row, TOPIC_OF_WORD[word]] += 1.0
+    return vectors
+
+
+class CountingEmbedder:
+    """Wraps an embedder to count texts and EMBED_BATCH_MAX-sized calls, with an optional cache."""
+
+    def __init__(self, embed, batch_max: int, cache: bool = False):
+        self._embed = embed
+        self.batch_max = batch_max
+        self.cache = {} if cache else None
+        self.texts = 0
+        self.calls = 0
+
+    async def __call__(self, texts):
+        missing = [text for text in dict.fromkeys(texts) if self.cache is None or text not in self.cache]
+        vectors = {}
+        for i in range(0, len(missing), self.batch_max):
+            batch = missing[i:i + self.batch_max]
+            vectors.update(zip(batch, await self._embed(batch)))
+            self.texts += len(batch)
+            self.calls += 1
+        if self.cache is not None:
+            self.cache.update(vectors)
+            vectors = self.cache
+        return [list(vectors[text]) for text in texts]
+
+
+def intact_scenes(chunks, questions) -> int:
+    """Scenes with both clue sentences in one chunk."""
+    return sum(any(all(clue in chunk["text"] for clue in clues) for chunk in chunks) for _, clues in questions)
+
+
+def hit_rate(chunks, questions, embed_sync, k: int) -> float:
+    texts = [chunk["text"] for chunk in chunks]
+    chunk_vectors = np.asarray(embed_sync(texts), dtype=np.float32)
+    query_vectors = np.asarray(embed_sync([query for query, _ in questions]), dtype=np.float32)
+    chunk_vectors /= np.maximum(np.linalg.norm(chunk_vectors, axis=1, keepdims=True), 1e-9)
+    query_vectors /= np.maximum(np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-9)
+    top = np.argsort(-(query_vectors @ chunk_vectors.T), axis=1)[:, :k]
+    hits = sum(
+        any(all(clue in texts[i] for clue in clues) for i in row)
+        for row, (_, clues) in zip(top, questions)
+    )
+    return hits / len(questions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenes", type=int, default=60)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200, help="recursive chunker only")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--batch-max", type=int, default=32, help="texts per embedding call, as EMBED_BATCH_MAX")
+    parser.add_argument("--embedder", choices=("offline", "ollama"), default="offline")
+    args = parser.parse_args()
+
+    if args.embedder == "ollama":
+        from core.llm import get_embeddings
+
+        async def embed(texts):
+            return await get_embeddings(list(texts))
+    else:
+        async def embed(texts):
+            return offline_embed(texts)
+
+    def embed_sync(texts):
+        counter = CountingEmbedder(embed, args.batch_max)
+        return asyncio.run(counter(texts))
+
+    text, questions = make_corpus(args.scenes)
+    print(f"corpus: {len(text):,} chars, {args.scenes} scenes, top-{args.top_k}, {args.embedder} embedder")
+
+    started = time.perf_counter()
+    recursive = chunk_document(text, args.chunk_size, args.chunk_overlap)
+    recursive_seconds = time.perf_counter() - started
+
+    sentences = CountingEmbedder(embed, args.batch_max, cache=True)
+    started = time.perf_counter()
+    semantic = asyncio.run(semantic_chunk_document(text, args.chunk_size, embed=sentences))
+    semantic_seconds = time.perf_counter() - started
+    first_texts, first_calls = sentences.texts, sentences.calls
+    # Re-planning the same text, as on a retry or re-upload, finds every sentence in the cache
+    started = time.perf_counter()
+    asyncio.run(semantic_chunk_document(text, args.chunk_size, embed=sentences))
+    cached_seconds = time.perf_counter() - started
+
+    for name, chunks, seconds, extra in (
+        ("recursive", recursive, recursive_seconds, "no extra embeddings"),
+        ("semantic", semantic, semantic_seconds,
+         f"+{first_texts:,} sentence embeddings in {first_calls:,} calls, "
+         f"{sentences.texts - first_texts} on a cached re-plan ({cached_seconds * 1000:.0f} ms)"),
+    ):
+        average = sum(len(chunk["text"]) for chunk in chunks) / len(chunks)
+        rate = hit_rate(chunks, questions, embed_sync, args.top_k)
+        print(
+            f"{name:>9}: {len(chunks):4d} chunks (avg {average:,.0f} chars), planned in {seconds * 1000:,.0f} ms, "
+            f"{intact_scenes(chunks, questions)}/{len(questions)} scenes intact, hit rate {rate:.1%}; {extra}"
+        )
+    calls = -(-len(semantic) // args.batch_max) + first_calls
+    print(
+        f"ingest cost: recursive {-(-len(recursive) // args.batch_max)} embedding calls, "
+        f"semantic {calls} ({first_texts + len(semantic):,} texts vs {len(recursive):,})"
+    )
+
+
+if __name__ == "__main__":
+    main()
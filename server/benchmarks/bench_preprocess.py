@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Micro-benchmark of preprocess_text against the original four-pass regex normalizer.
+
+Builds PDF-like text (form-feed pages with a running header, page-number
+footer, ligatures and hyphenated line breaks) and reports throughput.
+
+    python benchmarks/bench_preprocess.py [--pages 300] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+# Add the server directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.text_processing import preprocess_text
+
+WORDS = "the of and to in was he that it his her with as had for you not be on at by she which fine".split()
+
+
+def legacy_preprocess_text(text: str) -> str:
+    """preprocess_text before page-aware normalization, kept for comparison."""
+    text = re.sub(r'\s+', ' ', text)
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = re.sub(r'([.!?])\s*\n\s*', r'\1\n\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+def make_document(pages: int, line_ending: str = "\n", lines_per_page: int = 40, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    out = []
+    for page in range(pages):
+        lines = ["A  Novel  Title"]
+        for line in range(lines_per_page):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(8, 14))]
+            if rng.random() < 0.1:
+                words[-1] = "ﬁne"
+            text = "  ".join(words) if rng.random() < 0.2 else " ".join(words)
+            if rng.random() < 0.08:
+                text += " con-"
+            elif rng.random() < 0.15:
+                text += ".\n"
+            lines.append(text)
+        lines.append(f"   {page + 1}   ")
+        out.append(line_ending.join(lines))
+    return "\f".join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, line_ending in (("PDF-like, \\n line endings", "\n"), ("Windows TXT, \\r\\n line endings", "\r\n")):
+        text = make_document(args.pages, line_ending)
+        megabytes = len(text.encode("utf-8")) / 1e6
+        print(f"{label}: {args.pages} pages, {megabytes:.2f} MB, {text.count(chr(10)) + text.count(chr(12))} lines")
+
+        for name, function in (("legacy (4 passes)", legacy_preprocess_text), ("current", preprocess_text)):
+            seconds = min(timeit.repeat(lambda: function(text), number=1, repeat=args.repeat))
+            result = function(text)
+            print(
+                f"  {name:18s} {seconds * 1000:8.1f} ms  {megabytes / seconds:7.1f} MB/s  "
+                f"lines kept {result.count(chr(10)) + result.count(chr(12)):6d}  "
+                f"paragraph breaks {result.count(chr(10) * 2):5d}"
+            )
+
+if __name__ == "__main__":
+    main()
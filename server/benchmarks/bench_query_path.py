@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Micro-benchmark of the per-query hot path between vector search and the final payload.
+
+Times chunk construction, contextual compression, reference extraction and the
+final JSON serialization for a synthetic result set. No Ollama or Weaviate needed.
+
+    python benchmarks/bench_query_path.py [--hits 10] [--repeat 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+# Add the server directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.llm import OllamaCompressor
+from models.retrieval import RetrievedChunk
+from routes.query import extract_context_and_references
+from utils.serialization import serializer
+
+WORDS = "the dragon slept beneath the mountain while the village counted its gold and waited".split()
+
+
+def make_hits(count: int, dims: int = 768):
+    rng = random.Random(42)
+    return [
+        {
+            "uuid": f"00000000-0000-0000-0000-{i:012d}",
+            "content": " ".join(rng.choice(WORDS) for _ in range(180)),
+            "page": i // 5 + 1,
+            "start_line": i * 10 + 1,
+            "end_line": i * 10 + 20,
+            "document_id": "bench",
+            "distance": rng.random() / 2,
+            "vector": [rng.random() for _ in range(dims)],
+        }
+        for i in range(count)
+    ]
+
+
+def run_once(hits, question: str) -> bytes:
+    chunks = [RetrievedChunk(**hit) for hit in hits]
+    compressed = OllamaCompressor().compress_documents(chunks, question)
+    _, references = extract_context_and_references(compressed)
+    return serializer.dumps_line({"answer": "", "references": references, "done": True})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hits", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    hits = make_hits(args.hits)
+    question = "where did the dragon sleep"
+    seconds = timeit.timeit(lambda: run_once(hits, question), number=args.repeat)
+    per_query_us = seconds / args.repeat * 1e6
+    print(f"query path: {args.hits} hits, {args.repeat} runs, {per_query_us:.1f} us/query")
+
+
+if __name__ == "__main__":
+    main()
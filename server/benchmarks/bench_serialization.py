@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Micro-benchmark of per-token NDJSON event encoding for each available serializer.
+
+Simulates a streamed answer where every event carries the cumulative answer,
+as /query does, and compares the old json.dumps + str concat + encode pattern.
+
+    python benchmarks/bench_serialization.py [--tokens 400] [--repeat 50]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+# Add the server directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.serialization import SERIALIZERS
+
+
+def make_events(tokens: int):
+    answer = ""
+    events = []
+    for i in range(tokens):
+        answer += f"word{i} "
+        events.append({"answer": answer, "references": [], "done": False})
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    events = make_events(args.tokens)
+    candidates = {"json (legacy)": lambda chunk: (json.dumps(chunk) + "\n").encode("utf-8")}
+    for name, factory in SERIALIZERS.items():
+        candidates[name] = factory().dumps_line
+
+    for name, dumps_line in candidates.items():
+        seconds = timeit.timeit(lambda: [dumps_line(event) for event in events], number=args.repeat)
+        per_event_us = seconds / (args.repeat * len(events)) * 1e6
+        print(f"{name:>14}: {per_event_us:.2f} us/event over {len(events)} events")
+
+
+if __name__ == "__main__":
+    main()
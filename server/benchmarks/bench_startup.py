@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark: import time of server modules in fresh interpreters.
+
+Each module is imported in a new process, several times, and the median wall
+time is reported with the slowest imports from `python -X importtime`. Modules
+that need services to import, like `main` without Weaviate settings, are
+reported as failed.
+
+    python benchmarks/bench_startup.py [--repeat 5] [--top 8] [modules ...]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ["utils.text_processing", "core.planning", "core.semantic_chunking", "core.ingestion", "main"]
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_once(module: str, importtime: bool = False):
+    """Import module in a fresh interpreter; returns (seconds, stderr, return code)."""
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", f"import {module}"]
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=SERVER_DIR, capture_output=True, text=True)
+    return time.perf_counter() - started, result.stderr, result.returncode
+
+
+def package_times(stderr: str):
+    """Cumulative import time in ms of each top-level package, from -X importtime output."""
+    totals = {}
+    for _, cumulative_us, _, name in IMPORTTIME_LINE.findall(stderr):
+        # A package's outermost import includes its submodules
+        root = name.split(".")[0]
+        totals[root] = max(totals.get(root, 0), int(cumulative_us) / 1000)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="slowest packages listed per module")
+    args = parser.parse_args()
+
+    # Packages the bare interpreter already imports at start are left out of the listings
+    startup_packages = set(package_times(import_once("sys", importtime=True)[1]))
+    baseline = statistics.median(import_once("sys")[0] for _ in range(args.repeat))
+    print(f"interpreter start: {baseline * 1000:.0f} ms (median of {args.repeat})")
+    for module in args.modules:
+        _, stderr, code = import_once(module, importtime=True)
+        if code != 0:
+            print(f"{module}: failed ({stderr.strip().splitlines()[-1] if stderr.strip() else code})")
+            continue
+        median = statistics.median(import_once(module)[0] for _ in range(args.repeat))
+        times = [(name, ms) for name, ms in package_times(stderr).items() if name not in startup_packages]
+        slowest = sorted(times, key=lambda item: -item[1])[:args.top]
+        packages = ", ".join(f"{name} {ms:.0f}" for name, ms in slowest)
+        print(f"{module}: {median * 1000:.0f} ms ({(median - baseline) * 1000:.0f} ms over start); slowest ms: {packages}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import asyncio
+import os
+import tarfile
+import uuid
+import zipfile
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from db.job_store import ingestion_job_store
+from core.ingestion import SPOOL_DIR, create_ingestion_job, plan_document
+from core.planning import extract_text
+from core.ingestion_pool import ingestion_pool
+
+# Load environment variables from .env file
+load_dotenv()
+
+BULK_MAX_FILES = int(os.getenv("BULK_MAX_FILES", "1000"))
+
+DOCUMENT_EXTENSIONS = (".pdf", ".txt")
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz")
+
+# Bulk uploads this process is planning right now
+_planning: Set[str] = set()
+
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _is_document(name: str) -> bool:
+    base = os.path.basename(name)
+    # Skip hidden files and macOS resource forks that archivers add
+    return name.lower().endswith(DOCUMENT_EXTENSIONS) and not base.startswith(".") and "__MACOSX/" not in name
+
+
+def list_documents(filename: str, path: str) -> List[str]:
+    """Names of the documents in a spooled source: its archive members, or the file itself."""
+    lowered = filename.lower()
+    if lowered.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            return [info.filename for info in archive.infolist() if not info.is_dir() and _is_document(info.filename)]
+    if lowered.endswith((".tar", ".tar.gz", ".tgz")):
+        with tarfile.open(path) as archive:
+            return [member.name for member in archive.getmembers() if member.isfile() and _is_document(member.name)]
+    return [filename] if _is_document(filename) else []
+
+
+def iter_documents(filename: str, path: str) -> Iterator[Tuple[str, bytes]]:
+    """Yield (name, content) for each document in a spooled source, reading one member at a time."""
+    lowered = filename.lower()
+    if lowered.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and _is_document(info.filename):
+                    yield info.filename, archive.read(info)
+    elif lowered.endswith((".tar", ".tar.gz", ".tgz")):
+        with tarfile.open(path) as archive:
+            for member in archive.getmembers():
+                if member.isfile() and _is_document(member.name):
+                    yield member.name, archive.extractfile(member).read()
+    elif _is_document(filename):
+        with open(path, "rb") as f:
+            yield filename, f.read()
+
+
+def create_bulk_job(
+    files: List[Tuple[str, bytes]],
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str = "chars",
+    chunker: str = "recursive",
+    claim: bool = True
+) -> Dict[str, Any]:
+    """Spool uploaded files and archives and record one aggregate job before anything is planned.
+
+    With claim False the job is left unowned for an ingestion worker to plan.
+    """
+    bulk_id = str(uuid.uuid4())
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    sources = []
+    total_files = 0
+    try:
+        for i, (filename, content) in enumerate(files):
+            path = os.path.join(SPOOL_DIR, f"{bulk_id}.{i}{os.path.splitext(filename)[1].lower()}")
+            with open(path, "wb") as f:
+                f.write(content)
+            sources.append({"filename": filename, "path": path})
+            try:
+                total_files += len(list_documents(filename, path))
+            except (zipfile.BadZipFile, tarfile.TarError) as e:
+                raise HTTPException(status_code=400, detail=f"Could not read archive {filename}: {e}")
+        if total_files == 0:
+            raise HTTPException(status_code=400, detail=f"No {', '.join(DOCUMENT_EXTENSIONS)} files found in the upload")
+        if total_files > BULK_MAX_FILES:
+            raise HTTPException(status_code=413, detail=f"Bulk upload holds {total_files} files, the limit is {BULK_MAX_FILES}")
+    except Exception:
+        _discard_sources(sources)
+        raise
+    return ingestion_job_store.create_bulk(
+        bulk_id, sources, chunk_size, chunk_overlap, total_files, chunk_unit, chunker, claim=claim
+    )
+
+
+def _discard_sources(sources: List[Dict[str, str]]):
+    for source in sources:
+        try:
+            os.remove(source["path"])
+        except OSError:
+            pass
+
+
+async def plan_bulk_job(bulk_id: str):
+    """Plan each file of a bulk upload into its own ingestion job and queue it on the shared pool.
+
+    Files are queued as soon as they are planned, so embedding starts while the
+    rest of the library is still being extracted. Files planned before a restart
+    are recognised by the job name from bulk_file_name and skipped.
+    """
+    bulk = ingestion_job_store.get_bulk(bulk_id)
+    if bulk is None or bulk["status"] != "planning" or bulk_id in _planning:
+        return
+    if not ingestion_job_store.claim_bulk(bulk_id):
+        return  # Another server worker is planning it
+    _planning.add(bulk_id)
+
+    planned = {job["filename"] for job in ingestion_job_store.children(bulk_id)}
+    planned.update(entry["filename"] for entry in bulk["skipped"])
+    used_names: Set[str] = set()
+    try:
+        for index, source in enumerate(bulk["sources"]):
+            documents = iter_documents(source["filename"], source["path"])
+            occurrences: Dict[str, int] = {}
+            while True:
+                # Archive reads and text extraction run off the event loop
+                item = await asyncio.to_thread(next, documents, None)
+                if item is None:
+                    break
+                member, content = item
+                occurrences[member] = occurrences.get(member, 0) + 1
+                name = bulk_file_name(member, index, occurrences[member], used_names)
+                used_names.add(name)
+                if name in planned:
+                    continue
+                planned.add(name)
+                if occurrences[member] > 1:
+                    # An archive can hold two entries with the same path; only the first is ingested
+                    error = f"duplicate of an earlier {member} in {source['filename']}"
+                    print(f"Skipping {name} in bulk upload {bulk_id}: {error}")
+                    ingestion_job_store.record_bulk_file(bulk_id, name, error=error)
+                    continue
+                try:
+                    text = await asyncio.to_thread(extract_text, name, content)
+                    plan = await plan_document(
+                        text, bulk["chunk_size"], bulk["chunk_overlap"], bulk["chunk_unit"], bulk["chunker"]
+                    )
+                    job = await asyncio.to_thread(
+                        create_ingestion_job, name, content, bulk["chunk_size"], bulk["chunk_overlap"],
+                        parent_id=bulk_id, plan=plan, chunk_unit=bulk["chunk_unit"], chunker=bulk["chunker"]
+                    )
+                except Exception as e:
+                    print(f"Skipping {name} in bulk upload {bulk_id}: {e}")
+                    ingestion_job_store.record_bulk_file(bulk_id, name, error=str(e))
+                    continue
+                ingestion_job_store.record_bulk_file(bulk_id, name)
+                ingestion_pool.submit(job["id"])
+        ingestion_job_store.set_bulk_status(bulk_id, "planned")
+        _discard_sources(bulk["sources"])
+    except Exception as e:
+        print(f"Planning bulk upload {bulk_id} failed: {e}")
+        ingestion_job_store.set_bulk_status(bulk_id, "error")
+    finally:
+        _planning.discard(bulk_id)
+
+
+def bulk_file_name(member: str, source_index: int, occurrence: int, used_names: Set[str]) -> str:
+    """Job name of a document in a bulk upload: its path in the archive, or its file name.
+
+    Names are assigned in upload order, so the same upload always gets the same
+    names and a resumed plan recognises its files. A name an earlier upload
+    already used gets that upload's position. A repeat within one source gets
+    its occurrence number.
+    """
+    if occurrence > 1:
+        return f"{member} (upload {source_index + 1}, duplicate {occurrence})"
+    if member in used_names:
+        return f"{member} (upload {source_index + 1})"
+    return member
+
+
+def bulk_job_summary(bulk_id: str) -> Optional[Dict[str, Any]]:
+    """Aggregate a bulk upload's per-file jobs into one status."""
+    bulk = ingestion_job_store.get_bulk(bulk_id)
+    if bulk is None:
+        return None
+    files = ingestion_job_store.children(bulk_id)
+    counts = {status: 0 for status in ("queued", "running", "completed", "error")}
+    for job in files:
+        counts[job["status"]] = counts.get(job["status"], 0) + 1
+
+    if bulk["status"] == "error":
+        status = "error"
+    elif bulk["status"] == "planning" or counts["queued"] or counts["running"]:
+        status = "running"
+    elif counts["error"] or bulk["skipped"]:
+        status = "completed_with_errors"
+    else:
+        status = "completed"
+
+    return {
+        "id": bulk_id,
+        "status": status,
+        "total_files": bulk["total_files"],
+        "planned_files": bulk["planned_files"],
+        "files_by_status": counts,
+        "total_chunks": sum(job["total_chunks"] for job in files),
+        "committed_chunks": sum(job["committed_chunks"] for job in files),
+        "skipped": bulk["skipped"],
+        "files": [
+            {
+                key: job[key] for key in (
+                    "id", "document_id", "filename", "status", "total_chunks", "committed_chunks", "error"
+                )
+            }
+            for job in files
+        ],
+        "created_at": bulk["created_at"],
+        "updated_at": max([bulk["updated_at"], *(job["updated_at"] for job in files)])
+    }
+
+
+async def resume_bulk_jobs():
+    """Finish planning bulk uploads left by a stopped process; ones a live process is planning are left to it."""
+    for bulk_id in ingestion_job_store.bulk_ids_with_status("planning"):
+        if bulk_id in _planning or not ingestion_job_store.claim_bulk(bulk_id):
+            continue
+        print(f"Planning bulk upload {bulk_id}")
+        await plan_bulk_job(bulk_id)
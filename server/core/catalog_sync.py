@@ -0,0 +1,49 @@
+import os
+import time
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+from core.llm import OLLAMA_EMBED_MODEL
+from db.catalog import document_catalog
+
+# Load environment variables from .env file
+load_dotenv()
+
+# "auto" reconciles on startup only when the catalog is empty, e.g. after upgrading
+CATALOG_RECONCILE_ON_STARTUP = os.getenv("CATALOG_RECONCILE_ON_STARTUP", "auto").lower()
+CATALOG_RECONCILE_GROUP_LIMIT = int(os.getenv("CATALOG_RECONCILE_GROUP_LIMIT", "100000"))
+
+last_reconciliation: Optional[Dict[str, Any]] = None
+
+
+async def reconcile_catalog(weaviate_client) -> Dict[str, Any]:
+    """Rebuild catalog chunk counts from a Weaviate group-by over document_id."""
+    global last_reconciliation
+    started = time.perf_counter()
+    chunk_counts = await weaviate_client.count_chunks_by_document(group_limit=CATALOG_RECONCILE_GROUP_LIMIT)
+    aggregated = time.perf_counter()
+    summary = document_catalog.reconcile(chunk_counts, OLLAMA_EMBED_MODEL)
+    finished = time.perf_counter()
+
+    last_reconciliation = {
+        **summary,
+        "documents": len(chunk_counts),
+        "chunks": sum(info["chunk_count"] for info in chunk_counts.values()),
+        "aggregate_ms": round((aggregated - started) * 1000, 1),
+        "total_ms": round((finished - started) * 1000, 1),
+        "finished_at": time.time()
+    }
+    print(f"Catalog reconciled: {last_reconciliation}")
+    return last_reconciliation
+
+
+async def reconcile_catalog_on_startup(weaviate_client):
+    """Startup hook honouring CATALOG_RECONCILE_ON_STARTUP (always, auto or never)."""
+    if CATALOG_RECONCILE_ON_STARTUP == "never":
+        return
+    if CATALOG_RECONCILE_ON_STARTUP == "auto" and document_catalog.count() > 0:
+        return
+    try:
+        await reconcile_catalog(weaviate_client)
+    except Exception as e:
+        # A failed reconciliation must not keep the API from starting
+        print(f"Catalog reconciliation on startup failed: {e}")
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Tuple
+import httpx
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+# Load environment variables from .env file
+load_dotenv()
+
+EMBED_CONCURRENCY_ADAPTIVE = os.getenv("EMBED_CONCURRENCY_ADAPTIVE", "true").lower() == "true"
+EMBED_CONCURRENCY_INITIAL = int(os.getenv("EMBED_CONCURRENCY_INITIAL", "2"))
+EMBED_CONCURRENCY_MIN = int(os.getenv("EMBED_CONCURRENCY_MIN", "1"))
+EMBED_CONCURRENCY_MAX = int(os.getenv("EMBED_CONCURRENCY_MAX", "32"))
+# Back off when smoothed latency exceeds the baseline by this factor
+EMBED_LATENCY_TOLERANCE = float(os.getenv("EMBED_LATENCY_TOLERANCE", "1.5"))
+
+
+def is_overload_error(error: Exception) -> bool:
+    """Errors that mean the backend is saturated rather than that the request was bad."""
+    if isinstance(error, (httpx.TimeoutException, asyncio.TimeoutError, httpx.ConnectError)):
+        return True
+    return isinstance(error, HTTPException) and error.status_code >= 500
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on concurrent requests to a backend such as Ollama.
+
+    The limit grows by `increase` after `limit` consecutive requests complete
+    while latency stays within `latency_tolerance` of the baseline, counting
+    only requests the limit constrained (they waited for a slot or took the
+    last one), so an idle or lightly used limiter does not creep up. It is
+    multiplied by `decrease_factor` when smoothed latency rises past it or a
+    request fails with a timeout or 5xx. Latency is per unit of work, so
+    batches of different sizes compare fairly. A decrease only reacts to
+    requests started after the previous one, so a burst of slow in-flight
+    requests backs off once, not once per request.
+    """
+
+    def __init__(
+        self,
+        initial: int = EMBED_CONCURRENCY_INITIAL,
+        min_limit: int = EMBED_CONCURRENCY_MIN,
+        max_limit: int = EMBED_CONCURRENCY_MAX,
+        increase: float = 1.0,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = EMBED_LATENCY_TOLERANCE,
+        smoothing: float = 0.2,
+        adaptive: bool = EMBED_CONCURRENCY_ADAPTIVE
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = float(min(max(initial, min_limit), self.max_limit))
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.adaptive = adaptive
+        self.in_flight = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._smoothed: Optional[float] = None
+        self._baseline: Optional[float] = None
+        self._successes = 0
+        self._last_decrease = 0.0
+        self.stats = {"increases": 0, "decreases": 0, "errors": 0}
+
+    def _get_condition(self) -> asyncio.Condition:
+        # Created lazily so it binds to the running event loop
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self) -> Tuple[float, bool]:
+        """Wait for a free slot; returns the start time and whether the limit was reached, to pass to release()."""
+        condition = self._get_condition()
+        async with condition:
+            waited = self.in_flight >= int(self.limit)
+            await condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            limited = waited or self.in_flight >= int(self.limit)
+        return time.monotonic(), limited
+
+    async def release(self, started: float, units: int = 1, overloaded: bool = False, limited: bool = False):
+        latency = (time.monotonic() - started) / max(units, 1)
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            if self.adaptive:
+                self._update(started, latency, overloaded, limited)
+            condition.notify_all()
+
+    def _decrease(self, started: float):
+        if started < self._last_decrease:
+            return
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self._last_decrease = time.monotonic()
+        self._successes = 0
+        self.stats["decreases"] += 1
+
+    def _update(self, started: float, latency: float, overloaded: bool, limited: bool = False):
+        if overloaded:
+            self.stats["errors"] += 1
+            self._decrease(started)
+            return
+
+        if self._smoothed is None:
+            self._smoothed = latency
+        else:
+            self._smoothed += self.smoothing * (latency - self._smoothed)
+        if self._baseline is None or self._smoothed < self._baseline:
+            self._baseline = self._smoothed
+        else:
+            # Drift up slowly so a lasting slowdown (e.g. a bigger model) becomes the new normal
+            self._baseline += 0.01 * (self._smoothed - self._baseline)
+
+        if self._smoothed > self._baseline * self.latency_tolerance:
+            self._decrease(started)
+            return
+        if not limited:
+            # More slots would not have helped this request, so it says nothing about raising the limit
+            return
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + self.increase)
+            self._successes = 0
+            self.stats["increases"] += 1
+
+    @asynccontextmanager
+    async def slot(self, units: int = 1):
+        """Hold one concurrency slot around a request covering `units` items of work."""
+        started, limited = await self.acquire()
+        overloaded = False
+        try:
+            yield
+        except Exception as e:
+            overloaded = is_overload_error(e)
+            raise
+        finally:
+            await self.release(started, units, overloaded, limited)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "adaptive": self.adaptive,
+            "latency_ms": round(self._smoothed * 1000, 2) if self._smoothed is not None else None,
+            "baseline_ms": round(self._baseline * 1000, 2) if self._baseline is not None else None,
+            **self.stats
+        }
+
+
+# Create a singleton instance
+embedding_limiter = AdaptiveConcurrencyLimiter()
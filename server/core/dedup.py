@@ -0,0 +1,103 @@
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from db.dedup_index import near_duplicate_index
+from db.weaviate_client import weaviate_client
+from utils.minhash import MinHasher
+
+# Load environment variables from .env file
+load_dotenv()
+
+# off, exact (identical chunk text) or minhash (exact plus near-duplicates)
+INGEST_DEDUP = os.getenv("INGEST_DEDUP", "exact").lower()
+INGEST_MINHASH_THRESHOLD = float(os.getenv("INGEST_MINHASH_THRESHOLD", "0.9"))
+
+_minhasher = MinHasher()
+
+
+async def split_duplicates(
+    batch: List[Dict[str, Any]],
+    document_id: str,
+    seen_hashes: Optional[Set[str]] = None
+) -> Tuple[List[Dict[str, Any]], List[str], Dict[str, Any]]:
+    """Split a batch of planned chunks into those that need embedding and those already stored.
+
+    Stored chunks are shared with document_id right away. Returns (chunks to
+    embed, ids of the stored chunks now shared, MinHash signatures to index
+    once the new chunks are stored). A stored chunk deleted before it could be
+    shared is embedded instead. Chunks this document already references, e.g.
+    from a replayed batch, are dropped, as are repeats of hashes in
+    seen_hashes, which is updated with the hashes kept.
+    """
+    if INGEST_DEDUP == "off":
+        return batch, [], {}
+
+    stored = {}
+    for ref in await weaviate_client.find_chunk_refs(content_hashes=list({chunk['content_hash'] for chunk in batch})):
+        # Prefer a copy this document already references
+        if ref["content_hash"] not in stored or document_id in ref["document_ids"]:
+            stored[ref["content_hash"]] = ref
+
+    to_embed = []
+    # Stored chunk id -> the planned chunks it stands in for
+    shared: Dict[str, List[Dict[str, Any]]] = {}
+    signatures = {}
+    near_matches = []
+    if seen_hashes is None:
+        seen_hashes = set()
+    for chunk in batch:
+        ref = stored.get(chunk['content_hash'])
+        if ref is not None:
+            if ref["uuid"] != chunk['uuid'] and document_id not in ref["document_ids"]:
+                shared.setdefault(ref["uuid"], []).append(chunk)
+            continue
+        if chunk['content_hash'] in seen_hashes:
+            continue  # Repeated text within the batch or job is stored once
+        seen_hashes.add(chunk['content_hash'])
+
+        if INGEST_DEDUP == "minhash":
+            signature, band_keys = _minhasher.signature_and_bands(chunk['text'])
+            signatures[chunk['uuid']] = (signature, band_keys)
+            match = near_duplicate_index.best_match(signature, band_keys, INGEST_MINHASH_THRESHOLD)
+            if match is not None:
+                near_matches.append((chunk, match))
+                continue
+        to_embed.append(chunk)
+
+    if near_matches:
+        refs = {ref["uuid"]: ref for ref in await weaviate_client.find_chunk_refs(uuids=[match for _, match in near_matches])}
+        stale = []
+        for chunk, match in near_matches:
+            ref = refs.get(match)
+            if ref is None:
+                # The indexed chunk was deleted since; embed this one instead
+                stale.append(match)
+                to_embed.append(chunk)
+            elif document_id not in ref["document_ids"]:
+                shared.setdefault(ref["uuid"], []).append(chunk)
+        near_duplicate_index.remove(stale)
+
+    # Merged into the stored document_ids under a lock, so concurrent jobs sharing a chunk keep every reference
+    missing = await weaviate_client.add_chunk_references(document_id, list(shared))
+    for chunk_uuid in missing:
+        # Deleted since it was looked up; embed the chunks it stood in for
+        for chunk in shared.pop(chunk_uuid):
+            # Near-duplicates already passed seen_hashes and have a signature
+            if chunk['uuid'] not in signatures:
+                if chunk['content_hash'] in seen_hashes:
+                    continue
+                seen_hashes.add(chunk['content_hash'])
+                if INGEST_DEDUP == "minhash":
+                    signatures[chunk['uuid']] = _minhasher.signature_and_bands(chunk['text'])
+            to_embed.append(chunk)
+    near_duplicate_index.remove(missing)
+
+    embedded = {chunk['uuid'] for chunk in to_embed}
+    signatures = {chunk_uuid: value for chunk_uuid, value in signatures.items() if chunk_uuid in embedded}
+    return to_embed, list(shared), signatures
+
+
+def index_signatures(signatures: Dict[str, Any]):
+    """Make newly stored chunks findable as near-duplicates of later ingests."""
+    for chunk_uuid, (signature, band_keys) in signatures.items():
+        near_duplicate_index.add(chunk_uuid, signature, band_keys)
@@ -0,0 +1,43 @@
+import os
+from typing import List
+from dotenv import load_dotenv
+from db.catalog import document_catalog
+
+# Load environment variables from .env file
+load_dotenv()
+
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "500"))
+
+
+async def delete_document_in_background(weaviate_client, document_id: str):
+    """Delete a tombstoned document's chunks in batches, then drop it from the catalog.
+
+    The catalog chunk_count counts down as batches complete, so GET
+    /documents/{id} doubles as progress reporting. On failure the document
+    stays tombstoned and the delete can be retried.
+    """
+    try:
+        await weaviate_client.delete_document(
+            document_id,
+            batch_size=DELETE_BATCH_SIZE,
+            on_batch=lambda count: document_catalog.add_chunks(document_id, -count)
+        )
+        document_catalog.delete(document_id)
+    except Exception as e:
+        print(f"Background deletion of {document_id} failed: {e}")
+
+
+async def delete_all_in_background(weaviate_client, document_ids: List[str]):
+    """Delete the tombstoned documents one by one.
+
+    Only these documents' chunks are touched, so uploads and ingestion jobs
+    that run meanwhile keep theirs; dropping the collection would lose them.
+    """
+    for document_id in document_ids:
+        await delete_document_in_background(weaviate_client, document_id)
+
+
+async def resume_deletions(weaviate_client):
+    """Finish deletions interrupted by a restart."""
+    for document_id in document_catalog.tombstoned_ids():
+        await delete_document_in_background(weaviate_client, document_id)
@@ -0,0 +1,112 @@
+import asyncio
+import os
+from typing import Dict, List, Optional, Sequence
+from dotenv import load_dotenv
+from core.llm import get_embeddings, OLLAMA_EMBED_MODEL
+from core.concurrency import embedding_limiter
+from db.embedding_cache import embedding_cache
+from utils.hashing import content_hash
+
+# Load environment variables from .env file
+load_dotenv()
+
+EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "32"))  # texts per /api/embed call
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "10"))  # how long a partial batch waits for more texts
+
+
+class EmbeddingBatcher:
+    """Coalesces embedding requests from concurrent ingestion jobs into batched Ollama calls.
+
+    Texts are keyed by content hash: cached vectors are returned without a call,
+    and a text already queued or in flight for another caller is embedded once.
+    """
+
+    def __init__(
+        self,
+        cache=embedding_cache,
+        model: str = OLLAMA_EMBED_MODEL,
+        max_batch: int = EMBED_BATCH_MAX,
+        max_wait_ms: float = EMBED_BATCH_WAIT_MS,
+        limiter=embedding_limiter
+    ):
+        self.cache = cache
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        # Concurrent /api/embed calls adapt to how fast Ollama responds
+        self.limiter = limiter
+        self._pending: List[tuple] = []  # (content hash, text)
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks = set()
+        self.stats = {"requested": 0, "cache_hits": 0, "coalesced": 0, "embedded": 0, "calls": 0}
+
+    async def embed(self, texts: Sequence[str], hashes: Optional[Sequence[str]] = None) -> List[List[float]]:
+        """Return one vector per text, in order."""
+        hashes = list(hashes) if hashes is not None else [content_hash(text) for text in texts]
+        self.stats["requested"] += len(texts)
+        # The cache is SQLite, keep its reads off the event loop
+        vectors = await asyncio.to_thread(self.cache.get_many, self.model, hashes) if self.cache else {}
+        self.stats["cache_hits"] += sum(1 for h in hashes if h in vectors)
+
+        waiting = {}
+        for text, h in zip(texts, hashes):
+            if h in vectors or h in waiting:
+                continue
+            if h in self._futures:
+                self.stats["coalesced"] += 1
+            waiting[h] = self._enqueue(h, text)
+        if waiting:
+            results = await asyncio.gather(*waiting.values())
+            vectors.update(zip(waiting, results))
+        return [vectors[h] for h in hashes]
+
+    def _enqueue(self, text_hash: str, text: str) -> asyncio.Future:
+        future = self._futures.get(text_hash)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[text_hash] = future
+        self._pending.append((text_hash, text))
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._start_flush)
+        return future
+
+    def _start_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            task = asyncio.create_task(self._flush(batch))
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, batch: List[tuple]):
+        hashes = [h for h, _ in batch]
+        try:
+            async with self.limiter.slot(units=len(batch)):
+                vectors = await get_embeddings([text for _, text in batch])
+            self.stats["calls"] += 1
+            # zip() would stop at the shorter list and leave the remaining callers waiting forever
+            if len(vectors) != len(batch):
+                raise ValueError(f"Ollama returned {len(vectors)} embeddings for {len(batch)} texts")
+            self.stats["embedded"] += len(batch)
+            if self.cache:
+                await asyncio.to_thread(self.cache.put_many, self.model, dict(zip(hashes, vectors)))
+            for h, vector in zip(hashes, vectors):
+                future = self._futures.pop(h)
+                if not future.done():
+                    future.set_result(vector)
+        except Exception as e:
+            for h in hashes:
+                future = self._futures.pop(h, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+
+
+# Create a singleton instance
+embedding_batcher = EmbeddingBatcher()
@@ -0,0 +1,178 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+import httpx
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "3"))
+# Probe results kept per dependency for the latency history
+HEALTH_HISTORY_SIZE = int(os.getenv("HEALTH_HISTORY_SIZE", "60"))
+# Dependencies that must pass their last probe for /health/ready
+HEALTH_READY_DEPENDENCIES = [
+    name.strip() for name in os.getenv("HEALTH_READY_DEPENDENCIES", "ollama,weaviate").split(",") if name.strip()
+]
+
+Probe = Callable[[], Awaitable[bool]]
+
+
+class DependencyHealth:
+    """The latest probe result of one dependency and the history of recent ones."""
+
+    def __init__(self, name: str, history_size: int = HEALTH_HISTORY_SIZE):
+        self.name = name
+        self.ok = False
+        self.checked_at: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.consecutive_failures = 0
+        # (checked_at, ok, latency_ms) per probe, oldest first
+        self.history: Deque[Tuple[float, bool, float]] = deque(maxlen=history_size)
+
+    def record(self, ok: bool, latency_ms: float, error: Optional[str] = None):
+        error = None if ok else error or "probe failed"
+        # Only changes are logged, not every probe
+        if ok != self.ok or self.checked_at is None:
+            print(f"Health: {self.name} is {'up' if ok else 'down'}" + (f" ({error})" if error else ""))
+        self.ok = ok
+        self.checked_at = time.time()
+        self.latency_ms = round(latency_ms, 2)
+        self.last_error = error
+        self.consecutive_failures = 0 if ok else self.consecutive_failures + 1
+        self.history.append((self.checked_at, ok, self.latency_ms))
+
+    def snapshot(self, include_history: bool = False) -> Dict[str, Any]:
+        latencies = sorted(latency for _, ok, latency in self.history if ok)
+        snapshot = {
+            "ok": self.ok,
+            "checked_at": self.checked_at,
+            "latency_ms": self.latency_ms,
+            "latency_avg_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "latency_p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+            "success_rate": round(sum(ok for _, ok, _ in self.history) / len(self.history), 3) if self.history else None,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error
+        }
+        if include_history:
+            snapshot["history"] = [
+                {"checked_at": checked_at, "ok": ok, "latency_ms": latency}
+                for checked_at, ok, latency in self.history
+            ]
+        return snapshot
+
+
+class HealthProber:
+    """Probes dependencies on a fixed interval so health endpoints answer from memory.
+
+    However often /health is polled, each dependency sees one probe per
+    interval. Probes run concurrently, and one that takes longer than the
+    timeout counts as a failure.
+    """
+
+    def __init__(
+        self,
+        interval: float = HEALTH_PROBE_INTERVAL,
+        timeout: float = HEALTH_PROBE_TIMEOUT,
+        history_size: int = HEALTH_HISTORY_SIZE
+    ):
+        self.interval = interval
+        self.timeout = timeout
+        self.history_size = history_size
+        self.probes: Dict[str, Probe] = {}
+        self.dependencies: Dict[str, DependencyHealth] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._first_round: Optional[asyncio.Event] = None
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def register(self, name: str, probe: Probe):
+        self.probes[name] = probe
+        self.dependencies[name] = DependencyHealth(name, self.history_size)
+
+    async def _probe(self, name: str, probe: Probe):
+        started = time.perf_counter()
+        error = None
+        try:
+            ok = await asyncio.wait_for(probe(), self.timeout)
+        except asyncio.TimeoutError:
+            ok, error = False, f"no answer within {self.timeout:g}s"
+        except Exception as e:
+            ok, error = False, f"{type(e).__name__}: {e}"
+        self.dependencies[name].record(ok, (time.perf_counter() - started) * 1000, error)
+
+    async def probe_all(self):
+        await asyncio.gather(*(self._probe(name, probe) for name, probe in self.probes.items()))
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                print(f"Health probing failed: {e}")
+            self._first_round.set()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start probing in the background; the first round runs at once."""
+        if self._task is None or self._task.done():
+            self._first_round = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def wait_first_round(self):
+        """Wait, at most one probe timeout, for the first results after startup."""
+        if self._first_round is not None and not self._first_round.is_set():
+            try:
+                await asyncio.wait_for(self._first_round.wait(), self.timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """One client for HTTP probes, so probing reuses a connection instead of opening one each time."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=self.timeout)
+        return self._http
+
+    def is_ok(self, name: str) -> bool:
+        dependency = self.dependencies.get(name)
+        return dependency is not None and dependency.ok
+
+    def not_ready(self, required: List[str] = HEALTH_READY_DEPENDENCIES) -> List[str]:
+        """Required dependencies that failed their last probe or were never probed."""
+        return [name for name in required if not self.is_ok(name)]
+
+    def snapshot(self, include_history: bool = False) -> Dict[str, Dict[str, Any]]:
+        return {name: dependency.snapshot(include_history) for name, dependency in self.dependencies.items()}
+
+
+def create_health_prober() -> HealthProber:
+    """A prober for Ollama and Weaviate, the dependencies the API reports on."""
+    from core.llm import check_ollama_connection
+    from db.weaviate_client import weaviate_client
+
+    async def probe_weaviate() -> bool:
+        if not weaviate_client.ready:
+            raise ConnectionError(weaviate_client.last_error or "not connected yet")
+        return await weaviate_client.check_weaviate_connection()
+
+    prober = HealthProber()
+    prober.register("ollama", lambda: check_ollama_connection(prober.http))
+    prober.register("weaviate", probe_weaviate)
+    return prober
+
+
+# Create a singleton instance
+health_prober = create_health_prober()
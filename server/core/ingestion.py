@@ -0,0 +1,386 @@
+import asyncio
+import json
+import os
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from core.llm import OLLAMA_EMBED_MODEL
+from core.embedding_batcher import embedding_batcher
+from core.ingestion_pool import ingestion_pool
+from db.catalog import document_catalog
+from db.job_store import ingestion_job_store, RESUMABLE_STATUSES
+from db.local_store import DATA_DIR
+from db.status_store import processing_status
+from db.weaviate_client import weaviate_client
+from core.dedup import split_duplicates, index_signatures
+from core.planning import extract_text, plan_chunks
+from core.semantic_chunking import plan_semantic_chunks
+from utils.hashing import update_chunk_uuid
+
+SPOOL_DIR = os.path.join(DATA_DIR, "spool")
+# Chunks stored and checkpointed together; the embedding batcher merges batches of concurrent jobs
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "16"))
+# inline: the API process plans and embeds uploads; external: it only queues them for worker.py
+INGEST_MODES = ("inline", "external")
+INGEST_MODE = os.getenv("INGEST_MODE", "inline").lower()
+
+async def plan_document(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str = "chars",
+    chunker: str = "recursive"
+) -> Dict[str, Any]:
+    """Chunk and plan a document with the given chunker, off the event loop.
+
+    Semantic planning embeds sentences through the embedding batcher, so it
+    shares the cache and the Ollama batches of running jobs.
+    """
+    if chunker == "semantic":
+        return await plan_semantic_chunks(text, chunk_size, chunk_unit)
+    return await asyncio.to_thread(plan_chunks, text, chunk_size, chunk_overlap, chunk_unit)
+
+
+async def plan_update(
+    document_id: str,
+    filename: str,
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str = "chars",
+    chunker: str = "recursive"
+) -> Dict[str, Any]:
+    """Diff a new edition against the stored chunks of document_id by chunk content hash.
+
+    Only chunks whose hash is not already stored are planned for embedding.
+    Unchanged chunks keep their vectors and only get position updates if they
+    moved. Stored chunks absent from the new text are scheduled for deletion.
+    New chunks get ids from update_chunk_uuid, so they never overwrite a stored
+    chunk and are never among the deletions.
+    """
+    plan = await plan_document(text, chunk_size, chunk_overlap, chunk_unit, chunker)
+    existing = await weaviate_client.list_document_chunks(document_id)
+
+    stored_by_hash = defaultdict(list)
+    for stored in existing:
+        # Chunks stored before hashing have no content_hash and are simply replaced
+        stored_by_hash[stored.get("content_hash")].append(stored)
+    stored_by_hash.pop(None, None)
+
+    to_embed = []
+    property_updates = []
+    for chunk in plan["chunks"]:
+        matches = stored_by_hash.get(chunk['content_hash'])
+        if not matches:
+            chunk['uuid'] = update_chunk_uuid(document_id, chunk['content_hash'], chunk['chunk_index'])
+            to_embed.append(chunk)
+            continue
+        stored = matches.pop()
+        if stored.get("document_id") != document_id:
+            continue  # Shared chunk owned by another document keeps that document's position
+        position = {key: chunk[key] for key in ('chunk_index', 'page', 'start_line', 'end_line')}
+        position["filename"] = filename
+        if any(stored.get(key) != value for key, value in position.items()):
+            property_updates.append({"uuid": stored["uuid"], "properties": position})
+
+    kept = len(plan["chunks"]) - len(to_embed)
+    matched = {update["uuid"] for update in property_updates}
+    remaining = {stored["uuid"] for matches in stored_by_hash.values() for stored in matches}
+    # Released last, so an id that is also written now must not be among them
+    written = {chunk['uuid'] for chunk in to_embed}
+    delete_uuids = [
+        stored["uuid"] for stored in existing
+        if (stored["uuid"] in remaining or not stored.get("content_hash")) and stored["uuid"] not in written
+    ]
+    plan.update({
+        "mode": "update",
+        "document_id": document_id,
+        "chunks": to_embed,
+        "base_chunk_count": kept,
+        "property_updates": property_updates,
+        "delete_uuids": delete_uuids,
+        "stats": {
+            "total_chunks": kept + len(to_embed),
+            "unchanged_chunks": kept - len(matched),
+            "moved_chunks": len(matched),
+            "new_chunks": len(to_embed),
+            "deleted_chunks": len(delete_uuids)
+        }
+    })
+    return plan
+
+
+def _write_json_atomic(path: str, data: Any):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+def _write_spool(path: str, content: bytes):
+    with open(path, "wb") as f:
+        f.write(content)
+
+
+def _spool_paths(job_id: str, filename: str) -> Tuple[str, str]:
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    spool_path = os.path.join(SPOOL_DIR, job_id + os.path.splitext(filename)[1].lower())
+    plan_path = os.path.join(SPOOL_DIR, f"{job_id}.plan.json")
+    return spool_path, plan_path
+
+
+def create_ingestion_job(
+    filename: str,
+    content: bytes,
+    chunk_size: int,
+    chunk_overlap: int,
+    parent_id: Optional[str] = None,
+    plan: Optional[Dict[str, Any]] = None,
+    chunk_unit: str = "chars",
+    chunker: str = "recursive",
+    claim: bool = True
+) -> Dict[str, Any]:
+    """Spool the upload, write its chunk plan and record a queued job before any embedding starts.
+
+    Callers that already planned the file elsewhere, like the offline CLI, pass the plan.
+    Semantic chunking needs embeddings, so its plan always comes from plan_document.
+    With claim False the job is left unowned for an ingestion worker.
+    """
+    if plan is None and chunker != "recursive":
+        raise ValueError(f"{chunker} chunking must be planned with plan_document")
+    job_id = str(uuid.uuid4())
+    spool_path, plan_path = _spool_paths(job_id, filename)
+    _write_spool(spool_path, content)
+
+    if plan is None:
+        plan = plan_chunks(extract_text(filename, content), chunk_size, chunk_overlap, chunk_unit)
+    _write_json_atomic(plan_path, plan)
+
+    ingestion_job_store.create(
+        job_id, plan["document_id"], filename, spool_path, plan_path, chunk_size, chunk_overlap,
+        chunk_unit=chunk_unit, chunker=chunker, parent_id=parent_id, claim=claim
+    )
+    ingestion_job_store.update(job_id, total_chunks=len(plan["chunks"]))
+    document_catalog.add_document(plan["document_id"], filename, len(content), OLLAMA_EMBED_MODEL)
+    return ingestion_job_store.get(job_id)
+
+
+def enqueue_ingestion_job(
+    filename: str,
+    content: bytes,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str = "chars",
+    chunker: str = "recursive"
+) -> Dict[str, Any]:
+    """Spool the upload and record an unowned, unplanned job for an ingestion worker.
+
+    Nothing is extracted or chunked here. The document id depends on the text,
+    so it stays empty until the worker that runs the job plans it.
+    """
+    job_id = str(uuid.uuid4())
+    spool_path, plan_path = _spool_paths(job_id, filename)
+    _write_spool(spool_path, content)
+    return ingestion_job_store.create(
+        job_id, "", filename, spool_path, plan_path, chunk_size, chunk_overlap,
+        chunk_unit=chunk_unit, chunker=chunker, claim=False
+    )
+
+
+async def create_update_job(
+    document_id: str,
+    filename: str,
+    content: bytes,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str = "chars",
+    chunker: str = "recursive",
+    claim: bool = True
+) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """Like create_ingestion_job, but plans only the chunk-level diff against the stored document."""
+    job_id = str(uuid.uuid4())
+    spool_path, plan_path = _spool_paths(job_id, filename)
+    # File writes and PDF extraction run in threads, as in _load_plan, so the event loop keeps serving
+    await asyncio.to_thread(_write_spool, spool_path, content)
+    text = await asyncio.to_thread(extract_text, filename, content)
+
+    plan = await plan_update(document_id, filename, text, chunk_size, chunk_overlap, chunk_unit, chunker)
+    await asyncio.to_thread(_write_json_atomic, plan_path, plan)
+
+    ingestion_job_store.create(
+        job_id, document_id, filename, spool_path, plan_path, chunk_size, chunk_overlap,
+        chunk_unit=chunk_unit, chunker=chunker, mode="update", claim=claim
+    )
+    ingestion_job_store.update(job_id, total_chunks=len(plan["chunks"]))
+    document_catalog.update(document_id, filename=filename, byte_size=len(content), status="processing")
+    return ingestion_job_store.get(job_id), plan["stats"]
+
+
+async def _load_plan(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Read the job's chunk plan, re-planning from the spooled source if it was lost."""
+    try:
+        with open(job["plan_path"], encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        with open(job["spool_path"], "rb") as f:
+            content = f.read()
+        text = await asyncio.to_thread(extract_text, job["filename"], content)
+        if job["mode"] == "update":
+            plan = await plan_update(
+                job["document_id"], job["filename"], text, job["chunk_size"], job["chunk_overlap"],
+                job["chunk_unit"], job["chunker"]
+            )
+        else:
+            plan = await plan_document(
+                text, job["chunk_size"], job["chunk_overlap"], job["chunk_unit"], job["chunker"]
+            )
+        _write_json_atomic(job["plan_path"], plan)
+        return plan
+
+
+def _discard_spool(job: Dict[str, Any]):
+    for path in (job["spool_path"], job["plan_path"]):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _chunk_properties(chunk: Dict[str, Any], document_id: str, filename: str) -> Dict[str, Any]:
+    return {
+        "content": chunk['text'],
+        "document_id": document_id,
+        "filename": filename,
+        "page": chunk.get('page', 0),
+        "start_line": chunk.get('start_line', 0),
+        "end_line": chunk.get('end_line', 0),
+        "chunk_index": chunk.get('chunk_index', 0),
+        "content_hash": chunk['content_hash'],
+        "document_ids": [document_id]
+    }
+
+
+async def _stored_chunk_count(document_id: str, fallback: int) -> int:
+    """Chunks Weaviate holds for the document, counted once everything is written; fallback if it cannot answer.
+
+    The running count misses chunks of a batch replayed after a restart, which the document already references.
+    """
+    try:
+        return await weaviate_client.count_document_chunks(document_id)
+    except Exception as e:
+        print(f"Could not count the chunks of {document_id}, keeping the running count: {e}")
+        return fallback
+
+
+async def run_ingestion_job(job_id: str):
+    """Embed and store a job's planned chunks, resuming after the last committed batch."""
+    job = ingestion_job_store.get(job_id)
+    if job is None or job["status"] not in RESUMABLE_STATUSES:
+        return
+
+    document_id = job["document_id"]
+    filename = job["filename"]
+    try:
+        plan = await _load_plan(job)
+        if not document_id:
+            # Queued by enqueue_ingestion_job; the document exists once it is planned
+            document_id = plan["document_id"]
+            ingestion_job_store.update(job_id, document_id=document_id)
+            document_catalog.add_document(
+                document_id, filename, os.path.getsize(job["spool_path"]), OLLAMA_EMBED_MODEL
+            )
+        chunks: List[Dict[str, Any]] = plan["chunks"]
+        base_chunk_count = plan.get("base_chunk_count", 0)
+        start = job["committed_chunks"]
+        ingestion_job_store.update(job_id, status="running", total_chunks=len(chunks))
+        processing_status.update(
+            status="processing",
+            total_chunks=len(chunks),
+            processed_chunks=start,
+            current_document=filename
+        )
+
+        # Updates re-position unchanged chunks first; idempotent if replayed
+        if plan.get("property_updates") and job["committed_batches"] == 0:
+            await weaviate_client.update_chunk_properties(plan["property_updates"])
+
+        writer = weaviate_client.batch_writer()
+        try:
+            seen_hashes = set()
+            unindexed_signatures = {}
+            deduplicated = 0
+            # Chunks written or shared for this document; repeats it already references are skipped
+            stored = 0
+            stored_total = job.get("stored_chunks", 0)
+            for i in range(start, len(chunks), EMBED_BATCH_SIZE):
+                batch = chunks[i:i + EMBED_BATCH_SIZE]
+                # Chunks already stored for another document are referenced instead of re-embedded
+                to_embed, shared, signatures = await split_duplicates(batch, document_id, seen_hashes)
+                deduplicated += len(shared)
+                stored += len(to_embed) + len(shared)
+                if to_embed:
+                    embeddings = await embedding_batcher.embed(
+                        [chunk['text'] for chunk in to_embed],
+                        [chunk['content_hash'] for chunk in to_embed]
+                    )
+                    # Sent in the background as the writer's batches fill, while the next chunks embed.
+                    # Deterministic ids make a replayed batch overwrite its chunks instead of duplicating them
+                    await writer.add(
+                        [_chunk_properties(chunk, document_id, filename) for chunk in to_embed],
+                        embeddings,
+                        [chunk['uuid'] for chunk in to_embed]
+                    )
+                    unindexed_signatures.update(signatures)
+                committed = i + len(batch)
+                processing_status.update(processed_chunks=committed)
+
+                # Checkpoint only once everything queued so far is stored
+                if writer.pending >= writer.batch_size or committed == len(chunks):
+                    await writer.flush()
+                    index_signatures(unindexed_signatures)
+                    unindexed_signatures = {}
+                    ingestion_job_store.commit_batch(job_id, committed, deduplicated, stored)
+                    deduplicated = 0
+                    stored_total += stored
+                    stored = 0
+                    document_catalog.set_chunk_count(document_id, base_chunk_count + stored_total)
+        finally:
+            await writer.close()
+        if writer.stats["retried"]:
+            print(f"Ingestion job {job_id} for {filename}: {writer.stats['retried']} objects re-sent after batch errors")
+
+        # Removed chunks go last so the document stays searchable throughout an update
+        if plan.get("delete_uuids"):
+            await weaviate_client.release_chunks(document_id, plan["delete_uuids"])
+        document_catalog.set_chunk_count(
+            document_id, await _stored_chunk_count(document_id, base_chunk_count + stored_total)
+        )
+        ingestion_job_store.update(job_id, status="completed")
+        document_catalog.set_status(document_id, "ready")
+        processing_status.update(status="completed")
+        _discard_spool(job)
+    except Exception as e:
+        print(f"Ingestion job {job_id} for {filename} failed: {e}")
+        ingestion_job_store.update(job_id, status="error", error=str(e))
+        document_catalog.set_status(document_id, "error")
+        processing_status.update(status="error")
+
+
+def claim_jobs(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Claim up to limit unowned queued or running jobs, oldest first, and queue them on the ingestion pool.
+
+    Jobs owned by a live process, like another server or ingestion worker, are left to it.
+    """
+    claimed = []
+    for job in ingestion_job_store.resumable():
+        if limit is not None and len(claimed) >= limit:
+            break
+        if ingestion_pool.submit(job["id"]):
+            claimed.append(job)
+    return claimed
+
+
+async def resume_ingestion_jobs():
+    """Queue jobs left queued or running by a stopped process on the ingestion pool."""
+    for job in claim_jobs():
+        print(f"Resuming ingestion of {job['filename']} from chunk {job['committed_chunks']}/{job['total_chunks']}")
@@ -0,0 +1,77 @@
+import asyncio
+import os
+from typing import List, Optional, Set
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Ingestion jobs embedded at the same time, across uploads, bulk uploads, retries and resumes
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))
+
+
+class IngestionPool:
+    """Runs persisted ingestion jobs on a fixed pool of worker tasks."""
+
+    def __init__(self, workers: int = INGEST_CONCURRENCY):
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._scheduled: Set[str] = set()
+        self.active = 0
+
+    def _ensure_workers(self):
+        # Started lazily so the queue binds to the server's running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._worker_tasks = [task for task in self._worker_tasks if not task.done()]
+        while len(self._worker_tasks) < self.workers:
+            self._worker_tasks.append(asyncio.create_task(self._worker()))
+
+    async def _worker(self):
+        from core.ingestion import run_ingestion_job
+
+        while True:
+            job_id = await self._queue.get()
+            self.active += 1
+            try:
+                await run_ingestion_job(job_id)
+            except Exception as e:
+                print(f"Ingestion worker error for job {job_id}: {e}")
+            finally:
+                self.active -= 1
+                self._scheduled.discard(job_id)
+                self._queue.task_done()
+
+    def submit(self, job_id: str) -> bool:
+        """Queue a job unless it is already queued or running, here or in another server worker.
+
+        Returns whether it was queued.
+        """
+        from db.job_store import ingestion_job_store
+
+        if job_id in self._scheduled or not ingestion_job_store.claim(job_id):
+            return False
+        self._scheduled.add(job_id)
+        self._ensure_workers()
+        self._queue.put_nowait(job_id)
+        return True
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def join(self):
+        """Wait until every submitted job has finished."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def shutdown(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+
+# Create a singleton instance
+ingestion_pool = IngestionPool()
@@ -1,11 +1,11 @@
 import httpx
 from fastapi import HTTPException
-from typing import List, Dict, Any, AsyncGenerator
+from typing import List, Dict, Any, AsyncGenerator, Optional
 import json
 import os
 from dotenv import load_dotenv
 import asyncio
-from langchain_core.documents import Document
+from models.retrieval import RetrievedChunk
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,9 +15,12 @@ OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text:v1.5")
 OLLAMA_CHAT_MODEL = os.getenv("OLLAMA_CHAT_MODEL", "qwen3:4b")
 
 
-async def check_ollama_connection() -> bool:
-    """Check if Ollama is running and accessible"""
+async def check_ollama_connection(client: Optional[httpx.AsyncClient] = None) -> bool:
+    """Check if Ollama is running and accessible, reusing client's connection if given"""
     try:
+        if client is not None:
+            response = await client.get(f"{OLLAMA_BASE_URL}/api/tags")
+            return response.status_code == 200
         async with httpx.AsyncClient() as client:
             response = await client.get(f"{OLLAMA_BASE_URL}/api/tags")
             return response.status_code == 200
@@ -57,6 +60,45 @@ async def get_embedding(text: str) -> List[float]:
     
     raise HTTPException(status_code=500, detail="Failed to get embeddings from Ollama")
 
+async def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """Embed several texts in one call to Ollama's batch /api/embed endpoint, with retry logic.
+
+    /api/embed returns L2-normalized vectors; the collection uses cosine distance,
+    so they rank the same as /api/embeddings vectors.
+    """
+    if not texts:
+        return []
+    max_retries = 3
+    for attempt in range(max_retries):
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.post(
+                    f"{OLLAMA_BASE_URL}/api/embed",
+                    json={
+                        "model": OLLAMA_EMBED_MODEL,
+                        "input": texts
+                    },
+                    timeout=30.0 + 2.0 * len(texts)
+                )
+                response.raise_for_status()
+                return response.json()["embeddings"]
+        except httpx.HTTPStatusError as e:
+            if attempt == max_retries - 1:
+                raise HTTPException(
+                    status_code=e.response.status_code,
+                    detail=f"Failed to get embeddings after {max_retries} attempts. Ollama error: {e.response.text}"
+                )
+            await asyncio.sleep(1)
+        except Exception as e:
+            if attempt == max_retries - 1:
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Failed to get embeddings after {max_retries} attempts: {str(e)}"
+                )
+            await asyncio.sleep(1)
+
+    raise HTTPException(status_code=500, detail="Failed to get embeddings from Ollama")
+
 async def generate_streaming_response(prompt: str, tools: List[Dict[str, Any]] = None) -> AsyncGenerator[Dict[str, Any], None]:
     """Stream response chunks from Ollama /api/chat endpoint and yield answer as it builds up."""
     if tools is None:
@@ -119,7 +161,7 @@ class OllamaCompressor:
         self.model_name = model_name or OLLAMA_CHAT_MODEL
         self.ollama_base_url = OLLAMA_BASE_URL
         
-    def compress_documents(self, documents: List[Document], query: str) -> List[Document]:
+    def compress_documents(self, documents: List[RetrievedChunk], query: str) -> List[RetrievedChunk]:
         """Compress documents based on query relevance using Ollama."""
         # For now, we'll implement a simple relevance-based filtering
         # In a full implementation, you'd use the LLM to extract relevant parts
@@ -129,13 +171,13 @@ class OllamaCompressor:
         compressed_docs = []
         
         for doc in documents:
-            doc_words = set(doc.page_content.lower().split())
+            doc_words = set(doc.content.lower().split())
             relevance_score = len(query_words.intersection(doc_words)) / len(query_words) if query_words else 0
             
             # Keep documents with at least 10% keyword overlap
             if relevance_score > 0.1:
                 # Truncate very long documents while preserving important parts
-                content = doc.page_content
+                content = doc.content
                 if len(content) > 800:
                     # Try to find the most relevant sentences
                     sentences = content.split('. ')
@@ -150,15 +192,11 @@ class OllamaCompressor:
                     else:
                         content = content[:800]  # Fallback to truncation
                 
-                compressed_doc = Document(
-                    page_content=content,
-                    metadata={**doc.metadata, 'relevance_score': relevance_score}
-                )
-                compressed_docs.append(compressed_doc)
+                compressed_docs.append(doc.replace(content=content, vector=None, relevance_score=relevance_score))
         
         return compressed_docs
 
-async def compress_documents_with_llm(documents: List[Document], query: str) -> List[Document]:
+async def compress_documents_with_llm(documents: List[RetrievedChunk], query: str) -> List[RetrievedChunk]:
     """Advanced compression using LLM to extract only relevant parts."""
     # TODO: Implement actual LLM-based compression
     # This would send the documents and query to Ollama to extract only relevant excerpts
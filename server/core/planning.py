@@ -0,0 +1,48 @@
+from io import BytesIO
+from typing import Any, Dict, List
+from utils.text_processing import chunk_document
+from utils.hashing import content_hash, chunker_config_key, document_uuid, assign_chunk_ids
+
+# Text extraction and chunk planning only; no Weaviate or Ollama imports, so process pools can use it
+MIN_CHUNK_CHARS = 50  # Skip very small chunks
+
+
+def extract_text(filename: str, content: bytes) -> str:
+    """Extract plain text from an uploaded PDF or text file."""
+    # Detect file type by extension
+    if filename.lower().endswith('.pdf'):
+        # Use pypdf to extract text from PDF, imported on first use to keep startup fast
+        from pypdf import PdfReader
+        pdf_reader = PdfReader(BytesIO(content))
+        # Form feeds mark page breaks so chunks can cite their real page
+        return "\f".join(page.extract_text() or "" for page in pdf_reader.pages)
+    # Assume plain text; form feeds in it are treated as page breaks too
+    return content.decode("utf-8")
+
+
+def plan_chunks(text: str, chunk_size: int, chunk_overlap: int, chunk_unit: str = "chars") -> Dict[str, Any]:
+    """Chunk a document and fix each chunk's id, so the plan can be replayed after a restart."""
+    chunks = chunk_document(text, chunk_size, chunk_overlap, chunk_unit)
+    return build_plan(text, chunks, chunker_config_key(chunk_size, chunk_overlap, chunk_unit))
+
+
+def build_plan(text: str, chunks: List[Dict[str, Any]], chunker_config: str) -> Dict[str, Any]:
+    """Turn a document's chunks into a create plan with deterministic document and chunk ids."""
+    # Same text and chunker settings always map to the same document and chunk ids
+    document_hash = content_hash(text)
+    chunks = [
+        {
+            **{key: chunk[key] for key in ('text', 'page', 'start_line', 'end_line', 'chunk_index')},
+            'content_hash': content_hash(chunk['text'])
+        }
+        for chunk in chunks
+        if len(chunk['text']) >= MIN_CHUNK_CHARS
+    ]
+    return {
+        "mode": "create",
+        "document_id": document_uuid(document_hash, chunker_config),
+        "document_hash": document_hash,
+        "chunker_config": chunker_config,
+        "chunks": assign_chunk_ids(chunks, document_hash, chunker_config),
+        "base_chunk_count": 0
+    }
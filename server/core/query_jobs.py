@@ -0,0 +1,213 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
+from fastapi import HTTPException
+from dotenv import load_dotenv
+from db.query_job_store import query_job_store
+
+# Load environment variables from .env file
+load_dotenv()
+
+QUERY_JOB_WORKERS = int(os.getenv("QUERY_JOB_WORKERS", "2"))
+QUERY_JOB_TTL_SECONDS = int(os.getenv("QUERY_JOB_TTL_SECONDS", "900"))
+# How often a running job's answer is saved for other server workers, and how often they poll it
+QUERY_JOB_SYNC_INTERVAL = float(os.getenv("QUERY_JOB_SYNC_INTERVAL", "0.25"))
+
+QuerySource = Callable[[], AsyncGenerator[Dict[str, Any], None]]
+
+
+class QueryJob:
+    """A query whose answer is generated in the background and buffered for polling or streaming."""
+
+    def __init__(self, question: str, document_id: Optional[str] = None):
+        self.job_id = str(uuid.uuid4())
+        self.question = question
+        self.document_id = document_id
+        self.status = "queued"  # queued, running, completed, error
+        self.answer = ""
+        self.references: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._updated = asyncio.Condition()
+        self._saved_at = 0.0
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "error")
+
+    async def _publish(self, **changes):
+        async with self._updated:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self._updated.notify_all()
+        # Status changes are saved at once, answer tokens at most every QUERY_JOB_SYNC_INTERVAL
+        now = time.time()
+        if "status" in changes or now - self._saved_at >= QUERY_JOB_SYNC_INTERVAL:
+            self._saved_at = now
+            query_job_store.save(self.snapshot())
+
+    async def run(self, source: QuerySource):
+        """Drive the answer generator to completion, recording every update."""
+        await self._publish(status="running")
+        try:
+            async for chunk in source():
+                if chunk.get("done", False):
+                    await self._publish(
+                        answer=chunk.get("answer", ""),
+                        references=chunk.get("references", []),
+                        status="completed",
+                        finished_at=time.time()
+                    )
+                    return
+                await self._publish(answer=chunk.get("answer", ""))
+            await self._publish(status="completed", finished_at=time.time())
+        except HTTPException as e:
+            await self._publish(status="error", error=str(e.detail), finished_at=time.time())
+        except Exception as e:
+            print(f"Error in query job {self.job_id}: {e}")
+            await self._publish(status="error", error=str(e), finished_at=time.time())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "answer": self.answer,
+            "offset": len(self.answer),
+            "references": self.references,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+    async def stream(self, from_offset: int = 0) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield answer updates past `from_offset` characters until the job finishes.
+
+        Events keep the cumulative `answer` of the /query stream and add the
+        `offset` a reconnecting client should pass back to resume.
+        """
+        offset = from_offset
+        while True:
+            async with self._updated:
+                await self._updated.wait_for(lambda: self.done or len(self.answer) > offset)
+                event = {
+                    "answer": self.answer,
+                    "references": self.references if self.done else [],
+                    "offset": len(self.answer),
+                    "done": self.done
+                }
+                if self.error:
+                    event["error"] = self.error
+            offset = event["offset"]
+            yield event
+            if event["done"]:
+                return
+
+
+class SharedQueryJob:
+    """A query job that another server worker runs, followed through its saved snapshots."""
+
+    def __init__(self, snapshot: Dict[str, Any]):
+        self.job_id = snapshot["job_id"]
+        self._snapshot = snapshot
+
+    def snapshot(self) -> Dict[str, Any]:
+        return self._snapshot
+
+    async def stream(self, from_offset: int = 0) -> AsyncGenerator[Dict[str, Any], None]:
+        """Like QueryJob.stream, polling the saved snapshot every QUERY_JOB_SYNC_INTERVAL."""
+        offset = from_offset
+        snapshot = self._snapshot
+        while True:
+            done = snapshot["status"] in ("completed", "error")
+            if done or snapshot["offset"] > offset:
+                event = {
+                    "answer": snapshot["answer"],
+                    "references": snapshot["references"] if done else [],
+                    "offset": snapshot["offset"],
+                    "done": done
+                }
+                if snapshot["error"]:
+                    event["error"] = snapshot["error"]
+                offset = event["offset"]
+                yield event
+                if done:
+                    return
+            await asyncio.sleep(QUERY_JOB_SYNC_INTERVAL)
+            latest = query_job_store.get(self.job_id)
+            if latest is None:
+                # Expired, or its worker stopped before it finished
+                latest = {**snapshot, "status": "error", "error": "Query job is no longer available"}
+            snapshot = latest
+
+
+class QueryJobManager:
+    """Runs query jobs on a fixed pool of worker tasks and keeps results until they expire."""
+
+    def __init__(self, workers: int = QUERY_JOB_WORKERS, ttl_seconds: int = QUERY_JOB_TTL_SECONDS):
+        self.workers = workers
+        self.ttl_seconds = ttl_seconds
+        self.jobs: Dict[str, QueryJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+
+    def _ensure_workers(self):
+        # Started lazily so the queue binds to the server's running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._worker_tasks = [task for task in self._worker_tasks if not task.done()]
+        while len(self._worker_tasks) < self.workers:
+            self._worker_tasks.append(asyncio.create_task(self._worker()))
+
+    async def _worker(self):
+        while True:
+            job, source = await self._queue.get()
+            try:
+                await job.run(source)
+            finally:
+                self._queue.task_done()
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+        query_job_store.purge_finished(cutoff)
+
+    def submit(self, source: QuerySource, question: str, document_id: Optional[str] = None) -> QueryJob:
+        """Queue a query for background generation and return its job immediately."""
+        self._purge_expired()
+        job = QueryJob(question, document_id)
+        self.jobs[job.job_id] = job
+        query_job_store.save(job.snapshot())
+        self._ensure_workers()
+        self._queue.put_nowait((job, source))
+        return job
+
+    def get(self, job_id: str):
+        """The job if this worker runs it, else a SharedQueryJob if another worker does, else None."""
+        self._purge_expired()
+        if job_id in self.jobs:
+            return self.jobs[job_id]
+        snapshot = query_job_store.get(job_id)
+        return SharedQueryJob(snapshot) if snapshot else None
+
+    async def shutdown(self):
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        # Unfinished jobs are only purged once they end, so end them for workers following their snapshots
+        for job in self.jobs.values():
+            if not job.done:
+                job.status, job.error, job.finished_at = "error", "Query job was interrupted by a server shutdown", time.time()
+                query_job_store.save(job.snapshot())
+
+
+# Create a singleton instance
+query_jobs = QueryJobManager()
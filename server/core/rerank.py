@@ -0,0 +1,41 @@
+from typing import List, Sequence
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def maximal_marginal_relevance(
+    query_embedding: Sequence[float],
+    embeddings: Sequence[Sequence[float]],
+    k: int = 5,
+    lambda_mult: float = 0.5
+) -> List[int]:
+    """Pick k candidate indices balancing query relevance against redundancy.
+
+    lambda_mult=1 ranks purely by similarity to the query, lambda_mult=0 purely
+    by dissimilarity to the chunks already selected. Indices are returned in
+    selection order.
+    """
+    if k <= 0 or len(embeddings) == 0:
+        return []
+
+    vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+    query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+    relevance = vectors @ query
+    k = min(k, len(vectors))
+
+    selected = [int(np.argmax(relevance))]
+    # Highest cosine similarity of each candidate to anything already selected
+    redundancy = vectors @ vectors[selected[0]]
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(redundancy, vectors @ vectors[best], out=redundancy)
+
+    return selected
@@ -0,0 +1,226 @@
+import asyncio
+import os
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from utils.text_processing import LangChainChunker, TextPositions, chunk_length_function, preprocess_text
+from utils.hashing import chunker_config_key
+from core.planning import build_plan
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Chunks are at least this share of chunk_size unless the text runs out
+SEMANTIC_MIN_CHUNK_RATIO = float(os.getenv("SEMANTIC_MIN_CHUNK_RATIO", "0.25"))
+# Sentences averaged on each side of a candidate boundary, so one odd sentence is not a topic shift
+SEMANTIC_WINDOW_SENTENCES = int(os.getenv("SEMANTIC_WINDOW_SENTENCES", "3"))
+
+# A sentence ends at ., ! or ? with optional closing quotes or brackets, followed by whitespace;
+# blank lines end one too. Whitespace between sentences belongs to neither.
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])["\'”’)\]]*\s+|\n\s*\n\s*')
+
+Embed = Callable[[Sequence[str]], Awaitable[List[List[float]]]]
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets of the sentences in text, in order."""
+    spans = []
+    start = 0
+    for match in _SENTENCE_BREAK.finditer(text):
+        end = match.start() + len(match.group().rstrip())
+        if end > start:
+            spans.append((start, end))
+        start = match.end()
+    if start < len(text.rstrip()):
+        spans.append((start, len(text.rstrip())))
+    return spans
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def adjacent_distances(vectors: np.ndarray, window: int = 1) -> np.ndarray:
+    """Cosine distance across each gap between consecutive vectors.
+
+    Gap i lies between vectors i and i+1. Each side is the mean direction of up
+    to `window` vectors next to the gap, computed for all gaps at once from
+    prefix sums.
+    """
+    unit = _unit(np.asarray(vectors, dtype=np.float32))
+    count = len(unit)
+    prefix = np.concatenate((np.zeros((1, unit.shape[1]), dtype=np.float32), np.cumsum(unit, axis=0)))
+    gaps = np.arange(1, count)
+    left = prefix[gaps] - prefix[np.maximum(gaps - window, 0)]
+    right = prefix[np.minimum(gaps + window, count)] - prefix[gaps]
+    return 1.0 - np.einsum('ij,ij->i', _unit(left), _unit(right))
+
+
+def choose_boundaries(
+    lengths: Callable[[int, int], int],
+    distances: np.ndarray,
+    count: int,
+    max_size: int,
+    min_size: int
+) -> List[int]:
+    """Sentence indices where chunks end, exclusive, with the last one equal to count.
+
+    Each chunk ends at the largest distance among the gaps that leave it
+    between min_size and max_size long. The rest of the text becomes the last
+    chunk once it fits in max_size.
+    """
+    boundaries = []
+    start = 0
+    while start < count:
+        end = start + 1
+        while end < count and lengths(start, end + 1) <= max_size:
+            end += 1
+        if end == count:
+            boundaries.append(count)
+            break
+        # distances[b - 1] is the gap before sentence b
+        candidates = [b for b in range(start + 1, end + 1) if lengths(start, b) >= min_size] or [end]
+        start = max(candidates, key=lambda b: distances[b - 1])
+        boundaries.append(start)
+    return boundaries
+
+
+class SemanticChunker:
+    """Places chunk boundaries where the meaning of adjacent sentences drifts apart.
+
+    Sentences are embedded in batches and compared across each gap as the mean
+    of a window of sentences on either side. Each chunk ends at the sharpest
+    drop in similarity between a minimum share of chunk_size and chunk_size
+    itself. Sentences longer than chunk_size are split by the recursive chunker
+    first. Chunks do not overlap.
+    """
+
+    def __init__(
+        self,
+        embed: Embed,
+        chunk_size: int = 1000,
+        chunk_unit: str = "chars",
+        min_chunk_ratio: float = SEMANTIC_MIN_CHUNK_RATIO,
+        window: int = SEMANTIC_WINDOW_SENTENCES
+    ):
+        self.embed = embed
+        self.chunk_size = chunk_size
+        self.chunk_unit = chunk_unit
+        self.min_size = int(chunk_size * min_chunk_ratio)
+        self.window = window
+        self.length_function = chunk_length_function(chunk_unit, chunk_size)
+
+    def _sentences(self, text: str) -> List[Tuple[int, int]]:
+        spans = []
+        splitter = None
+        for start, end in split_sentences(text):
+            # A token covers at least one character, so a sentence no longer than chunk_size characters fits
+            if end - start <= self.chunk_size or self.length_function(text[start:end]) <= self.chunk_size:
+                spans.append((start, end))
+                continue
+            if splitter is None:
+                splitter = LangChainChunker(self.chunk_size, 0, chunk_unit=self.chunk_unit)
+            for piece in splitter.create_chunks(text[start:end]):
+                offset = start + piece['metadata'].get('start_index', 0)
+                spans.append((offset, offset + len(piece['text'])))
+        return spans
+
+    def _measure(self, text: str) -> Tuple[List[Tuple[int, int]], Callable[[int, int], int]]:
+        """Sentence spans and the length of any run of them, spans[i:j]."""
+        spans = self._sentences(text)
+        if self.chunk_unit == "chars":
+            def lengths(i: int, j: int) -> int:
+                return spans[j - 1][1] - spans[i][0]
+        else:
+            # Token counts add up across whitespace-separated sentences
+            totals = np.concatenate(([0], np.cumsum([self.length_function(text[s:e]) for s, e in spans])))
+
+            def lengths(i: int, j: int) -> int:
+                return int(totals[j] - totals[i])
+        return spans, lengths
+
+    def _build_chunks(
+        self,
+        text: str,
+        positions: TextPositions,
+        spans: List[Tuple[int, int]],
+        lengths: Callable[[int, int], int],
+        distances: np.ndarray
+    ) -> List[Dict[str, Any]]:
+        chunks = []
+        start = 0
+        for end in choose_boundaries(lengths, distances, len(spans), self.chunk_size, self.min_size):
+            chunk_start, chunk_end = spans[start][0], spans[end - 1][1]
+            page, start_line, end_line = positions.locate(chunk_start, chunk_end)
+            chunks.append({
+                'text': text[chunk_start:chunk_end],
+                'page': page,
+                'start_line': start_line,
+                'end_line': end_line,
+                'chunk_index': len(chunks),
+                'metadata': {'start_index': chunk_start}
+            })
+            start = end
+        return chunks
+
+    async def create_chunks(self, text: str, positions: Optional[TextPositions] = None) -> List[Dict[str, Any]]:
+        """Split text into chunk dicts shaped like LangChainChunker.create_chunks.
+
+        Sentence splitting, the distances and the boundary pass run in worker
+        threads; only the embedding call is awaited on the event loop.
+        """
+        if positions is None:
+            positions = await asyncio.to_thread(TextPositions, text)
+        spans, lengths = await asyncio.to_thread(self._measure, text)
+        if not spans:
+            return []
+
+        if len(spans) > 1:
+            vectors = await self.embed([text[start:end] for start, end in spans])
+            distances = await asyncio.to_thread(adjacent_distances, vectors, self.window)
+        else:
+            distances = np.zeros(0, dtype=np.float32)
+        return await asyncio.to_thread(self._build_chunks, text, positions, spans, lengths, distances)
+
+
+def semantic_config_key(chunk_size: int, chunk_unit: str, model: str) -> str:
+    """Chunker config for semantic chunks; boundaries depend on the embedding model and window."""
+    # Reuse the unit-specific part, which names the tokenizer for token sizes
+    unit_key = chunker_config_key(chunk_size, 0, chunk_unit)
+    return f"semantic:{unit_key}:{model}:m{SEMANTIC_MIN_CHUNK_RATIO:g}:w{SEMANTIC_WINDOW_SENTENCES}"
+
+
+def _prepare_text(text: str) -> Tuple[str, TextPositions]:
+    """Preprocess text and record page and line offsets, then turn page breaks into line breaks (same length)."""
+    processed_text = preprocess_text(text)
+    positions = TextPositions(processed_text)
+    return processed_text.replace('\f', '\n'), positions
+
+
+async def semantic_chunk_document(
+    text: str,
+    chunk_size: int,
+    chunk_unit: str = "chars",
+    embed: Optional[Embed] = None
+) -> List[Dict[str, Any]]:
+    """Preprocess and chunk a document semantically; the counterpart of chunk_document.
+
+    Sentence vectors go through the ingestion embedding batcher by default, so
+    they are cached and batched with concurrent jobs.
+    """
+    if embed is None:
+        from core.embedding_batcher import embedding_batcher
+        embed = embedding_batcher.embed
+    processed_text, positions = await asyncio.to_thread(_prepare_text, text)
+    return await SemanticChunker(embed, chunk_size, chunk_unit).create_chunks(processed_text, positions)
+
+
+async def plan_semantic_chunks(text: str, chunk_size: int, chunk_unit: str = "chars") -> Dict[str, Any]:
+    """Like planning.plan_chunks, with semantic chunk boundaries."""
+    from core.llm import OLLAMA_EMBED_MODEL
+
+    chunks = await semantic_chunk_document(text, chunk_size, chunk_unit)
+    return build_plan(text, chunks, semantic_config_key(chunk_size, chunk_unit, OLLAMA_EMBED_MODEL))
@@ -1,53 +1,73 @@
-from typing import List, Optional
-from langchain_core.documents import Document
+from typing import List, Optional, Sequence
+import os
+from dotenv import load_dotenv
+from models.retrieval import RetrievedChunk
+from core.rerank import maximal_marginal_relevance
+
+# Load environment variables from .env file
+load_dotenv()
+
+RETRIEVER_MMR_ENABLED = os.getenv("RETRIEVER_MMR_ENABLED", "true").lower() == "true"
+RETRIEVER_MMR_LAMBDA = float(os.getenv("RETRIEVER_MMR_LAMBDA", "0.5"))
+RETRIEVER_MMR_FETCH_K = int(os.getenv("RETRIEVER_MMR_FETCH_K", "25"))
+
+# Only what the prompt and the references payload use
+RETRIEVAL_PROPERTIES = ("content", "page", "start_line", "end_line", "document_id")
 
 class WeaviateRetriever:
     """Custom retriever that integrates with our existing Weaviate client."""
-    
-    def __init__(self, weaviate_client, k: int = 5):
+
+    def __init__(
+        self,
+        weaviate_client,
+        k: int = 5,
+        use_mmr: bool = RETRIEVER_MMR_ENABLED,
+        fetch_k: int = RETRIEVER_MMR_FETCH_K,
+        lambda_mult: float = RETRIEVER_MMR_LAMBDA
+    ):
         self.weaviate_client = weaviate_client
         self.k = k
-    
-    async def get_relevant_documents(self, query: str, document_id: Optional[str] = None) -> List[Document]:
-        """Retrieve relevant documents from Weaviate using the existing client."""
+        # With MMR we over-fetch fetch_k candidates and keep the k most relevant yet diverse
+        self.use_mmr = use_mmr
+        self.fetch_k = max(fetch_k, k)
+        self.lambda_mult = lambda_mult
+
+    async def get_relevant_documents(
+        self,
+        query: str,
+        document_id: Optional[str] = None,
+        exclude_document_ids: Sequence[str] = ()
+    ) -> List[RetrievedChunk]:
+        """Retrieve relevant chunks from Weaviate using the existing client."""
         from core.llm import get_embedding
-        
+
         # Get query embedding
         query_embedding = await get_embedding(query)
-        
+
         # Use the existing search_similar method from db/weaviate_client
-        objects = await self.weaviate_client.search_similar(
-            query_embedding, 
-            document_id=document_id, 
-            limit=self.k
+        chunks = await self.weaviate_client.search_similar(
+            query_embedding,
+            document_id=document_id,
+            limit=self.fetch_k if self.use_mmr else self.k,
+            return_properties=RETRIEVAL_PROPERTIES,
+            include_vector=self.use_mmr,
+            exclude_document_ids=exclude_document_ids
+        )
+
+        if self.use_mmr:
+            chunks = self._diversify(query_embedding, chunks)
+        return chunks
+
+    def _diversify(self, query_embedding: List[float], chunks: List[RetrievedChunk]) -> List[RetrievedChunk]:
+        """Re-rank over-fetched chunks with Maximal Marginal Relevance."""
+        candidates = [chunk for chunk in chunks if chunk.vector]
+        if len(candidates) <= self.k:
+            return candidates or chunks[:self.k]
+
+        selected = maximal_marginal_relevance(
+            query_embedding,
+            [chunk.vector for chunk in candidates],
+            k=self.k,
+            lambda_mult=self.lambda_mult
         )
-        
-        # Convert Weaviate objects to LangChain Documents
-        documents = []
-        for obj in objects:
-            if hasattr(obj, 'properties'):
-                props = obj.properties
-                content = props.get("content", "")
-                
-                # Calculate similarity score from distance
-                distance = 0
-                if hasattr(obj, 'metadata') and obj.metadata and hasattr(obj.metadata, 'distance'):
-                    distance = obj.metadata.distance or 0
-                similarity_score = 1 - distance if distance is not None else 0
-                
-                # Create LangChain Document with metadata
-                doc = Document(
-                    page_content=content,
-                    metadata={
-                        'page': props.get("page", 0),
-                        'start_line': props.get("start_line", 0),
-                        'end_line': props.get("end_line", 0),
-                        'document_id': props.get("document_id", ""),
-                        'filename': props.get("filename", ""),
-                        'chunk_index': props.get("chunk_index", 0),
-                        'similarity_score': round(similarity_score, 3)
-                    }
-                )
-                documents.append(doc)
-        
-        return documents
+        return [candidates[i] for i in selected]
@@ -0,0 +1,128 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+# Load environment variables from .env file
+load_dotenv()
+
+WEAVIATE_BATCH_MODE = os.getenv("WEAVIATE_BATCH_MODE", "fixed_size").lower()  # fixed_size, rate_limit or dynamic
+WEAVIATE_BATCH_SIZE = int(os.getenv("WEAVIATE_BATCH_SIZE", "100"))
+WEAVIATE_BATCH_CONCURRENCY = int(os.getenv("WEAVIATE_BATCH_CONCURRENCY", "2"))  # concurrent batch requests
+WEAVIATE_BATCH_RATE_LIMIT = int(os.getenv("WEAVIATE_BATCH_RATE_LIMIT", "6000"))  # objects per minute in rate_limit mode
+WEAVIATE_BATCH_RETRIES = int(os.getenv("WEAVIATE_BATCH_RETRIES", "2"))  # re-sends of individually failed objects
+
+
+class BatchWriter:
+    """One Weaviate batch kept open for a whole ingestion job.
+
+    Objects are sent in the background as they are added, in batches of
+    batch_size, so inserts overlap with embedding. flush() waits for them and
+    re-sends only the objects Weaviate rejected. Objects still failing after
+    max_retries are reported together instead of failing every object sent.
+    """
+
+    def __init__(
+        self,
+        collection,
+        mode: str = WEAVIATE_BATCH_MODE,
+        batch_size: int = WEAVIATE_BATCH_SIZE,
+        concurrency: int = WEAVIATE_BATCH_CONCURRENCY,
+        requests_per_minute: int = WEAVIATE_BATCH_RATE_LIMIT,
+        max_retries: int = WEAVIATE_BATCH_RETRIES
+    ):
+        self.collection = collection
+        self.mode = mode
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.requests_per_minute = requests_per_minute
+        self.max_retries = max_retries
+        self.pending = 0  # objects added since the last flush
+        self.stats = {"added": 0, "retried": 0, "failed": 0, "flushes": 0}
+        self._context = None
+        self._batch = None
+        self._seen_failures = 0
+
+    def _open(self):
+        if self.mode == "fixed_size":
+            self._context = self.collection.batch.fixed_size(
+                batch_size=self.batch_size, concurrent_requests=self.concurrency
+            )
+        elif self.mode == "rate_limit":
+            self._context = self.collection.batch.rate_limit(requests_per_minute=self.requests_per_minute)
+        else:
+            self._context = self.collection.batch.dynamic()
+        self._batch = self._context.__enter__()
+
+    def _add(self, documents: List[Dict[str, Any]], embeddings: List[List[float]], uuids: List[Optional[str]]):
+        if self._batch is None:
+            self._open()
+        for properties, vector, object_uuid in zip(documents, embeddings, uuids):
+            self._batch.add_object(properties=properties, vector=vector, uuid=object_uuid)
+
+    def _new_failures(self) -> List[Any]:
+        failed = self.collection.batch.failed_objects
+        new = failed[self._seen_failures:]
+        self._seen_failures = len(failed)
+        return new
+
+    def _flush(self) -> List[Dict[str, Any]]:
+        if self._batch is None:
+            return []
+        self._batch.flush()
+        failures = self._new_failures()
+        for _ in range(self.max_retries):
+            if not failures:
+                break
+            self.stats["retried"] += len(failures)
+            for failure in failures:
+                self._batch.add_object(
+                    properties=failure.object_.properties,
+                    vector=failure.object_.vector,
+                    uuid=failure.object_.uuid
+                )
+            self._batch.flush()
+            failures = self._new_failures()
+        self.stats["failed"] += len(failures)
+        self.stats["flushes"] += 1
+        self.pending = 0
+        return [{"uuid": str(failure.object_.uuid), "message": failure.message} for failure in failures]
+
+    def _close(self):
+        if self._context is not None:
+            self._context.__exit__(None, None, None)
+            self._context = None
+            self._batch = None
+
+    async def add(
+        self,
+        documents: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+        uuids: Optional[List[str]] = None
+    ):
+        """Queue objects for insertion; they are sent in the background as batches fill."""
+        if uuids is None:
+            uuids = [None] * len(documents)
+        if len(documents) != len(embeddings) or len(documents) != len(uuids):
+            raise ValueError("The number of documents, embeddings and uuids must be the same for batch insertion.")
+        # add_object blocks while the send queue is full, so stay off the event loop
+        await asyncio.to_thread(self._add, documents, embeddings, uuids)
+        self.pending += len(documents)
+        self.stats["added"] += len(documents)
+
+    async def flush(self):
+        """Wait until every queued object is stored, retrying rejected ones.
+
+        Raises an HTTPException naming the objects that still failed.
+        """
+        failures = await asyncio.to_thread(self._flush)
+        if failures:
+            sample = "; ".join(f"{failure['uuid']}: {failure['message']}" for failure in failures[:3])
+            raise HTTPException(
+                status_code=500,
+                detail=f"{len(failures)} objects failed after {self.max_retries} retries: {sample}"
+            )
+
+    async def close(self):
+        await asyncio.to_thread(self._close)
@@ -0,0 +1,177 @@
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from models.api_models import DocumentInfo
+from db.local_store import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    byte_size INTEGER NOT NULL DEFAULT 0,
+    uploaded_at TEXT NOT NULL,
+    embed_model TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_uploaded_at ON documents (uploaded_at);
+CREATE INDEX IF NOT EXISTS idx_documents_status ON documents (status);
+"""
+
+
+class DocumentCatalog:
+    """One row per uploaded document, maintained at ingest so listing never scans chunks."""
+
+    def __init__(self, path: Optional[str] = None):
+        # Status is one of processing, ready, error or deleting (tombstoned)
+        self._connection = connect(path) if path else connect()
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.executescript(_SCHEMA)
+
+    def _row_to_info(self, row) -> DocumentInfo:
+        return DocumentInfo(
+            id=row["id"],
+            filename=row["filename"],
+            chunk_count=row["chunk_count"],
+            upload_date=row["uploaded_at"],
+            byte_size=row["byte_size"],
+            embed_model=row["embed_model"],
+            status=row["status"]
+        )
+
+    def add_document(self, document_id: str, filename: str, byte_size: int, embed_model: str, status: str = "processing"):
+        """Register a document at upload time, resetting counts if it is being re-ingested."""
+        uploaded_at = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT INTO documents (id, filename, chunk_count, byte_size, uploaded_at, embed_model, status)
+                VALUES (?, ?, 0, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    filename = excluded.filename,
+                    chunk_count = 0,
+                    byte_size = excluded.byte_size,
+                    uploaded_at = excluded.uploaded_at,
+                    embed_model = excluded.embed_model,
+                    status = excluded.status
+                """,
+                (document_id, filename, byte_size, uploaded_at, embed_model, status)
+            )
+
+    def add_chunks(self, document_id: str, count: int):
+        with self._lock:
+            self._connection.execute(
+                "UPDATE documents SET chunk_count = chunk_count + ? WHERE id = ?",
+                (count, document_id)
+            )
+
+    def update(self, document_id: str, **fields):
+        """Set catalog columns (filename, byte_size, uploaded_at, status, ...) on one document."""
+        if not fields:
+            return
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._connection.execute(
+                f"UPDATE documents SET {assignments} WHERE id = ?",
+                (*fields.values(), document_id)
+            )
+
+    def set_chunk_count(self, document_id: str, chunk_count: int):
+        with self._lock:
+            self._connection.execute(
+                "UPDATE documents SET chunk_count = ? WHERE id = ?",
+                (chunk_count, document_id)
+            )
+
+    def set_status(self, document_id: str, status: str):
+        with self._lock:
+            self._connection.execute("UPDATE documents SET status = ? WHERE id = ?", (status, document_id))
+
+    def tombstone_all(self) -> List[str]:
+        """Mark every document not being ingested as deleting in one statement and return their ids."""
+        with self._lock:
+            rows = self._connection.execute(
+                "UPDATE documents SET status = 'deleting' WHERE status != 'processing' RETURNING id"
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def ids_with_status(self, status: str) -> List[str]:
+        with self._lock:
+            rows = self._connection.execute("SELECT id FROM documents WHERE status = ?", (status,)).fetchall()
+        return [row["id"] for row in rows]
+
+    def tombstoned_ids(self) -> List[str]:
+        """Documents being deleted; their chunks must be filtered out of search."""
+        return self.ids_with_status("deleting")
+
+    def get(self, document_id: str) -> Optional[DocumentInfo]:
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM documents WHERE id = ?", (document_id,)).fetchone()
+        return self._row_to_info(row) if row else None
+
+    def list_documents(self, limit: int = 50, offset: int = 0) -> Tuple[List[DocumentInfo], int]:
+        """Return one page of documents, newest first, and the total document count."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT * FROM documents ORDER BY uploaded_at DESC, id LIMIT ? OFFSET ?",
+                (limit, offset)
+            ).fetchall()
+            total = self._connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        return [self._row_to_info(row) for row in rows], total
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def reconcile(self, chunk_counts: Dict[str, Dict[str, Any]], embed_model: str) -> Dict[str, int]:
+        """Make catalog chunk counts match `chunk_counts` (document_id -> chunk_count, filename).
+
+        Documents missing from the catalog are added as ready, and ready documents
+        with no chunks left are removed. Documents still processing are left alone.
+        """
+        uploaded_at = datetime.now(timezone.utc).isoformat()
+        summary = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                existing = {
+                    row["id"]: row
+                    for row in self._connection.execute("SELECT id, chunk_count, status FROM documents")
+                }
+                for document_id, info in chunk_counts.items():
+                    row = existing.get(document_id)
+                    if row is None:
+                        self._connection.execute(
+                            """
+                            INSERT INTO documents (id, filename, chunk_count, byte_size, uploaded_at, embed_model, status)
+                            VALUES (?, ?, ?, 0, ?, ?, 'ready')
+                            """,
+                            (document_id, info["filename"], info["chunk_count"], uploaded_at, embed_model)
+                        )
+                        summary["added"] += 1
+                    elif row["status"] != "processing" and row["chunk_count"] != info["chunk_count"]:
+                        self._connection.execute(
+                            "UPDATE documents SET chunk_count = ? WHERE id = ?",
+                            (info["chunk_count"], document_id)
+                        )
+                        summary["updated"] += 1
+                    else:
+                        summary["unchanged"] += 1
+                for document_id, row in existing.items():
+                    if document_id not in chunk_counts and row["status"] == "ready":
+                        self._connection.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+                        summary["removed"] += 1
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+        return summary
+
+    def delete(self, document_id: str):
+        with self._lock:
+            self._connection.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+
+
+# Create a singleton instance
+document_catalog = DocumentCatalog()
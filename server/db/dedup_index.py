@@ -0,0 +1,77 @@
+import threading
+from typing import List, Optional, Sequence
+import numpy as np
+from db.local_store import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS minhash_signatures (
+    chunk_uuid TEXT PRIMARY KEY,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS minhash_bands (
+    band_key TEXT NOT NULL,
+    chunk_uuid TEXT NOT NULL,
+    PRIMARY KEY (band_key, chunk_uuid)
+);
+"""
+
+
+class NearDuplicateIndex:
+    """Local LSH index of chunk MinHash signatures for near-duplicate lookup at ingest.
+
+    Entries may outlive their chunks; callers verify candidates still exist in Weaviate
+    and prune the ones that do not.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._connection = connect(path) if path else connect()
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.executescript(_SCHEMA)
+
+    def add(self, chunk_uuid: str, signature: np.ndarray, band_keys: Sequence[str]):
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO minhash_signatures (chunk_uuid, signature) VALUES (?, ?)",
+                    (chunk_uuid, signature.astype(np.uint32).tobytes())
+                )
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO minhash_bands (band_key, chunk_uuid) VALUES (?, ?)",
+                    [(key, chunk_uuid) for key in band_keys]
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def best_match(self, signature: np.ndarray, band_keys: Sequence[str], threshold: float) -> Optional[str]:
+        """Return the indexed chunk most similar to signature, if it reaches threshold."""
+        placeholders = ", ".join("?" for _ in band_keys)
+        with self._lock:
+            rows = self._connection.execute(
+                f"""
+                SELECT s.chunk_uuid, s.signature FROM minhash_signatures s
+                WHERE s.chunk_uuid IN (SELECT DISTINCT chunk_uuid FROM minhash_bands WHERE band_key IN ({placeholders}))
+                """,
+                list(band_keys)
+            ).fetchall()
+        best_uuid, best_score = None, threshold
+        for row in rows:
+            score = float(np.mean(np.frombuffer(row["signature"], dtype=np.uint32) == signature))
+            if score >= best_score:
+                best_uuid, best_score = row["chunk_uuid"], score
+        return best_uuid
+
+    def remove(self, chunk_uuids: List[str]):
+        if not chunk_uuids:
+            return
+        placeholders = ", ".join("?" for _ in chunk_uuids)
+        with self._lock:
+            self._connection.execute(f"DELETE FROM minhash_signatures WHERE chunk_uuid IN ({placeholders})", chunk_uuids)
+            self._connection.execute(f"DELETE FROM minhash_bands WHERE chunk_uuid IN ({placeholders})", chunk_uuids)
+
+
+# Create a singleton instance
+near_duplicate_index = NearDuplicateIndex()
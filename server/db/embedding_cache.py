@@ -0,0 +1,82 @@
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from dotenv import load_dotenv
+from db.local_store import connect
+
+# Load environment variables from .env file
+load_dotenv()
+
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "true"
+# Oldest entries are evicted past this many vectors (~3 KB each for 768 dimensions)
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "200000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    PRIMARY KEY (model, content_hash)
+);
+"""
+
+
+class EmbeddingCache:
+    """Embedding vectors keyed by (embedding model, content hash), stored as float32."""
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = EMBED_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._connection = connect(path) if path else connect()
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.executescript(_SCHEMA)
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, List[float]]:
+        if not hashes:
+            return {}
+        unique = list(dict.fromkeys(hashes))
+        found = {}
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(unique), 500):
+            part = unique[i:i + 500]
+            placeholders = ", ".join("?" for _ in part)
+            with self._lock:
+                rows = self._connection.execute(
+                    f"SELECT content_hash, vector FROM embedding_cache WHERE model = ? AND content_hash IN ({placeholders})",
+                    (model, *part)
+                ).fetchall()
+            for row in rows:
+                found[row["content_hash"]] = np.frombuffer(row["vector"], dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, Sequence[float]]):
+        if not vectors:
+            return
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache (model, content_hash, vector) VALUES (?, ?, ?)",
+                    [
+                        (model, content_hash, np.asarray(vector, dtype=np.float32).tobytes())
+                        for content_hash, vector in vectors.items()
+                    ]
+                )
+                # Rowids only grow on insert, so this keeps the newest max_entries rows
+                self._connection.execute(
+                    "DELETE FROM embedding_cache WHERE rowid <= (SELECT MAX(rowid) FROM embedding_cache) - ?",
+                    (self.max_entries,)
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM embedding_cache")
+
+
+# Create a singleton instance
+embedding_cache = EmbeddingCache() if EMBED_CACHE_ENABLED else None
@@ -0,0 +1,267 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from db.local_store import connect, ensure_columns, process_alive
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id TEXT PRIMARY KEY,
+    document_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    mode TEXT NOT NULL DEFAULT 'create',
+    spool_path TEXT NOT NULL,
+    plan_path TEXT NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    chunk_overlap INTEGER NOT NULL,
+    total_chunks INTEGER NOT NULL DEFAULT 0,
+    committed_chunks INTEGER NOT NULL DEFAULT 0,
+    committed_batches INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_status ON ingestion_jobs (status);
+CREATE TABLE IF NOT EXISTS bulk_ingestion_jobs (
+    id TEXT PRIMARY KEY,
+    sources TEXT NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    chunk_overlap INTEGER NOT NULL,
+    total_files INTEGER NOT NULL,
+    planned_files INTEGER NOT NULL DEFAULT 0,
+    skipped TEXT NOT NULL DEFAULT '[]',
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+# Jobs in these states are picked up again after a restart
+RESUMABLE_STATUSES = ("queued", "running")
+
+
+class IngestionJobStore:
+    """Durable ingestion job records with a per-batch commit checkpoint."""
+
+    def __init__(self, path: Optional[str] = None):
+        # Status is one of queued, running, completed or error; mode is create or update.
+        # owner_pid is the process that created or claimed the job and runs it
+        self._connection = connect(path) if path else connect()
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.executescript(_SCHEMA)
+            ensure_columns(self._connection, "ingestion_jobs", {
+                "mode": "TEXT NOT NULL DEFAULT 'create'",
+                "deduplicated_chunks": "INTEGER NOT NULL DEFAULT 0",
+                "stored_chunks": "INTEGER NOT NULL DEFAULT 0",
+                "parent_id": "TEXT",
+                "chunk_unit": "TEXT NOT NULL DEFAULT 'chars'",
+                "chunker": "TEXT NOT NULL DEFAULT 'recursive'",
+                "owner_pid": "INTEGER"
+            })
+            ensure_columns(self._connection, "bulk_ingestion_jobs", {
+                "chunk_unit": "TEXT NOT NULL DEFAULT 'chars'",
+                "chunker": "TEXT NOT NULL DEFAULT 'recursive'",
+                "owner_pid": "INTEGER"
+            })
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_parent ON ingestion_jobs (parent_id)"
+            )
+
+    def create(
+        self,
+        job_id: str,
+        document_id: str,
+        filename: str,
+        spool_path: str,
+        plan_path: str,
+        chunk_size: int,
+        chunk_overlap: int,
+        chunk_unit: str = "chars",
+        chunker: str = "recursive",
+        mode: str = "create",
+        parent_id: Optional[str] = None,
+        claim: bool = True
+    ) -> Dict[str, Any]:
+        """Record a queued job, owned by this process unless claim is False."""
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT INTO ingestion_jobs (
+                    id, document_id, filename, mode, spool_path, plan_path, chunk_size, chunk_overlap,
+                    chunk_unit, chunker, parent_id, owner_pid, status, created_at, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?)
+                """,
+                (
+                    job_id, document_id, filename, mode, spool_path, plan_path, chunk_size, chunk_overlap,
+                    chunk_unit, chunker, parent_id, os.getpid() if claim else None, now, now
+                )
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM ingestion_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def update(self, job_id: str, **fields):
+        if not fields:
+            return
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._connection.execute(
+                f"UPDATE ingestion_jobs SET {assignments} WHERE id = ?",
+                (*fields.values(), job_id)
+            )
+
+    def commit_batch(self, job_id: str, committed_chunks: int, deduplicated_chunks: int = 0, stored_chunks: int = 0):
+        """Checkpoint that every planned chunk before committed_chunks is stored.
+
+        stored_chunks counts the chunks written or shared since the last checkpoint;
+        repeats the document already references are not among them.
+        """
+        with self._lock:
+            self._connection.execute(
+                """
+                UPDATE ingestion_jobs
+                SET committed_chunks = ?, committed_batches = committed_batches + 1,
+                    deduplicated_chunks = deduplicated_chunks + ?, stored_chunks = stored_chunks + ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (committed_chunks, deduplicated_chunks, stored_chunks, time.time(), job_id)
+            )
+
+    def _claim(self, table: str, job_id: str, statuses) -> bool:
+        """Make this process the owner of a job in one of statuses.
+
+        Succeeds if the job is unowned, already ours, or owned by a process that
+        has exited. The owner is compared and set in one statement, so two
+        server workers never both claim a job.
+        """
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT owner_pid FROM {table} WHERE id = ? AND status IN ({placeholders})", (job_id, *statuses)
+            ).fetchone()
+            if row is None:
+                return False
+            owner = row["owner_pid"]
+            if owner == os.getpid():
+                return True
+            if owner is not None and process_alive(owner):
+                return False
+            cursor = self._connection.execute(
+                f"UPDATE {table} SET owner_pid = ?, updated_at = ? WHERE id = ? AND owner_pid IS ?",
+                (os.getpid(), time.time(), job_id, owner)
+            )
+        return cursor.rowcount == 1
+
+    def claim(self, job_id: str) -> bool:
+        """Claim a queued or running job for this process; see _claim."""
+        return self._claim("ingestion_jobs", job_id, RESUMABLE_STATUSES)
+
+    def resumable(self) -> List[Dict[str, Any]]:
+        placeholders = ", ".join("?" for _ in RESUMABLE_STATUSES)
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT * FROM ingestion_jobs WHERE status IN ({placeholders}) ORDER BY created_at",
+                RESUMABLE_STATUSES
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def create_bulk(
+        self,
+        bulk_id: str,
+        sources: List[Dict[str, str]],
+        chunk_size: int,
+        chunk_overlap: int,
+        total_files: int,
+        chunk_unit: str = "chars",
+        chunker: str = "recursive",
+        claim: bool = True
+    ) -> Dict[str, Any]:
+        """Record a bulk upload whose spooled sources still have to be planned into per-file jobs."""
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT INTO bulk_ingestion_jobs (
+                    id, sources, chunk_size, chunk_overlap, chunk_unit, chunker, total_files, owner_pid,
+                    status, created_at, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'planning', ?, ?)
+                """,
+                (
+                    bulk_id, json.dumps(sources), chunk_size, chunk_overlap, chunk_unit, chunker, total_files,
+                    os.getpid() if claim else None, now, now
+                )
+            )
+        return self.get_bulk(bulk_id)
+
+    def get_bulk(self, bulk_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM bulk_ingestion_jobs WHERE id = ?", (bulk_id,)).fetchone()
+        if row is None:
+            return None
+        bulk = dict(row)
+        bulk["sources"] = json.loads(bulk["sources"])
+        bulk["skipped"] = json.loads(bulk["skipped"])
+        return bulk
+
+    def bulk_ids_with_status(self, status: str) -> List[str]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id FROM bulk_ingestion_jobs WHERE status = ? ORDER BY created_at", (status,)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def record_bulk_file(self, bulk_id: str, filename: str, error: Optional[str] = None):
+        """Count one more planned file, remembering why it was skipped if it could not be planned."""
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._connection.execute(
+                    "SELECT skipped FROM bulk_ingestion_jobs WHERE id = ?", (bulk_id,)
+                ).fetchone()
+                skipped = json.loads(row["skipped"])
+                if error is not None:
+                    skipped.append({"filename": filename, "error": error})
+                self._connection.execute(
+                    """
+                    UPDATE bulk_ingestion_jobs
+                    SET planned_files = planned_files + 1, skipped = ?, updated_at = ?
+                    WHERE id = ?
+                    """,
+                    (json.dumps(skipped), time.time(), bulk_id)
+                )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def claim_bulk(self, bulk_id: str) -> bool:
+        """Claim a bulk upload that is still being planned for this process; see _claim."""
+        return self._claim("bulk_ingestion_jobs", bulk_id, ("planning",))
+
+    def set_bulk_status(self, bulk_id: str, status: str):
+        with self._lock:
+            self._connection.execute(
+                "UPDATE bulk_ingestion_jobs SET status = ?, updated_at = ? WHERE id = ?",
+                (status, time.time(), bulk_id)
+            )
+
+    def children(self, bulk_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT * FROM ingestion_jobs WHERE parent_id = ? ORDER BY created_at", (bulk_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+# Create a singleton instance
+ingestion_job_store = IngestionJobStore()
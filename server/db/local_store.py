@@ -0,0 +1,76 @@
+import fcntl
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, IO, Optional
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Local state (document catalog, job bookkeeping) lives next to the server by default
+DATA_DIR = os.getenv("RAG_DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+STATE_DB_PATH = os.getenv("RAG_STATE_DB", os.path.join(DATA_DIR, "state.db"))
+
+
+def connect(path: str = STATE_DB_PATH) -> sqlite3.Connection:
+    """Open the local SQLite state database in WAL mode."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Autocommit; callers group multi-statement writes in explicit transactions
+    connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30.0)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def ensure_columns(connection: sqlite3.Connection, table: str, columns: Dict[str, str]):
+    """Add columns (name -> SQL definition) that an older database is missing."""
+    existing = {row["name"] for row in connection.execute(f"PRAGMA table_info({table})")}
+    for name, definition in columns.items():
+        if name not in existing:
+            connection.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+def process_alive(pid: int) -> bool:
+    """Whether a process with this id is running on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _lock_path(name: str) -> str:
+    path = os.path.join(os.path.dirname(os.path.abspath(STATE_DB_PATH)), f"{name}.lock")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def try_lock(name: str) -> Optional[IO]:
+    """Take the exclusive lock `name` next to the state database without waiting.
+
+    Returns the open lock file, which holds the lock until it is closed or the
+    process exits, or None if another process holds it.
+    """
+    lock_file = open(_lock_path(name), "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+@contextmanager
+def hold_lock(name: str):
+    """Hold the exclusive lock `name` next to the state database, waiting for it if needed.
+
+    Each call opens the lock file anew, so threads of one process exclude each
+    other as well as other processes. Blocking: call it from a worker thread.
+    """
+    with open(_lock_path(name), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
@@ -0,0 +1,74 @@
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+from db.local_store import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    answer TEXT NOT NULL DEFAULT '',
+    references_json TEXT NOT NULL DEFAULT '[]',
+    error TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_query_jobs_updated_at ON query_jobs (updated_at);
+"""
+
+
+class QueryJobStore:
+    """Snapshots of background query jobs, so any server worker can answer for a job another one runs."""
+
+    def __init__(self, path: Optional[str] = None):
+        self._connection = connect(path) if path else connect()
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.executescript(_SCHEMA)
+
+    def save(self, snapshot: Dict[str, Any]):
+        """Store a QueryJob.snapshot(), replacing the previous one."""
+        with self._lock:
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO query_jobs (
+                    id, status, answer, references_json, error, created_at, finished_at, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    snapshot["job_id"], snapshot["status"], snapshot["answer"], json.dumps(snapshot["references"]),
+                    snapshot["error"], snapshot["created_at"], snapshot["finished_at"], time.time()
+                )
+            )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job's last snapshot, shaped like QueryJob.snapshot()."""
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM query_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "answer": row["answer"],
+            "offset": len(row["answer"]),
+            "references": json.loads(row["references_json"]),
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "finished_at": row["finished_at"]
+        }
+
+    def purge_finished(self, finished_before: float):
+        """Drop completed and failed jobs that finished before finished_before; queued and running jobs are kept."""
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM query_jobs WHERE status IN ('completed', 'error') AND finished_at < ?",
+                (finished_before,)
+            )
+
+
+# Create a singleton instance
+query_job_store = QueryJobStore()
@@ -0,0 +1,53 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+from db.local_store import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS processing_status (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    status TEXT NOT NULL DEFAULT 'idle',
+    total_chunks INTEGER NOT NULL DEFAULT 0,
+    processed_chunks INTEGER NOT NULL DEFAULT 0,
+    current_document TEXT,
+    updated_at REAL NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO processing_status (id) VALUES (1);
+"""
+
+FIELDS = ("status", "total_chunks", "processed_chunks", "current_document")
+
+
+class ProcessingStatusStore:
+    """The latest ingestion progress reported by /status, shared by every server worker."""
+
+    def __init__(self, path: Optional[str] = None):
+        # Status is one of idle, processing, completed or error
+        self._connection = connect(path) if path else connect()
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.executescript(_SCHEMA)
+
+    def get(self) -> Dict[str, Any]:
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {', '.join(FIELDS)} FROM processing_status WHERE id = 1"
+            ).fetchone()
+        return dict(row)
+
+    def update(self, **fields):
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown processing status fields: {', '.join(sorted(unknown))}")
+        if not fields:
+            return
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._connection.execute(
+                f"UPDATE processing_status SET {assignments} WHERE id = 1", tuple(fields.values())
+            )
+
+
+# Create a singleton instance
+processing_status = ProcessingStatusStore()
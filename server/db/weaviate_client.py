@@ -1,45 +1,165 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Callable
 import weaviate
 import weaviate.classes as wvc
 from weaviate.exceptions import WeaviateConnectionError
 from fastapi import HTTPException
 import os
+import asyncio
 from dotenv import load_dotenv
-from models.api_models import DocumentInfo
+from models.retrieval import RetrievedChunk
+from db.batch_writer import BatchWriter
+from db.local_store import hold_lock
 import traceback # Added for detailed error logging
 
 # Load environment variables from .env file
 load_dotenv()
 
+CONTENT_HASH_PROPERTY = wvc.config.Property(
+    name="content_hash",
+    data_type=wvc.config.DataType.TEXT,
+    description="SHA-256 of the chunk text, used to diff re-ingested documents",
+    skip_vectorization=True
+)
+
+DOCUMENT_IDS_PROPERTY = wvc.config.Property(
+    name="document_ids",
+    data_type=wvc.config.DataType.TEXT_ARRAY,
+    description="Every document containing this chunk; duplicate chunks are stored once and shared",
+    skip_vectorization=True
+)
+
+# Serializes read-modify-writes of document_ids across jobs, threads and worker processes
+CHUNK_REFERENCES_LOCK = "chunk-references"
+
+# Properties introduced after the original schema, added to existing collections on startup
+ADDED_PROPERTIES = (CONTENT_HASH_PROPERTY, DOCUMENT_IDS_PROPERTY)
+
+def document_filter(document_id: str):
+    """Match chunks owned by or shared with a document."""
+    return wvc.query.Filter.any_of([
+        wvc.query.Filter.by_property("document_id").equal(document_id),
+        wvc.query.Filter.by_property("document_ids").contains_any([document_id])
+    ])
+
+# Every chunk property; callers should ask search_similar for the subset they need
+SEARCH_PROPERTIES = ("content", "page", "start_line", "end_line", "document_id", "filename", "chunk_index")
+
+def _to_retrieved_chunk(obj) -> RetrievedChunk:
+    """Build a RetrievedChunk straight from a Weaviate v4 result object."""
+    props = obj.properties
+    vector = obj.vector
+    # Unnamed collections return their vector under "default"
+    if isinstance(vector, dict):
+        vector = vector.get("default")
+    return RetrievedChunk(
+        uuid=str(obj.uuid),
+        content=props.get("content", ""),
+        page=props.get("page", 0),
+        start_line=props.get("start_line", 0),
+        end_line=props.get("end_line", 0),
+        document_id=props.get("document_id", ""),
+        filename=props.get("filename", ""),
+        chunk_index=props.get("chunk_index", 0),
+        distance=obj.metadata.distance if obj.metadata else None,
+        vector=vector or None
+    )
+
+# Connection retries back off exponentially from the base delay up to the max delay
+WEAVIATE_CONNECT_RETRY_BASE = float(os.getenv("WEAVIATE_CONNECT_RETRY_BASE", "1"))
+WEAVIATE_CONNECT_RETRY_MAX = float(os.getenv("WEAVIATE_CONNECT_RETRY_MAX", "30"))
+
 class WeaviateClient:
+    """Weaviate Cloud client; the connection is opened by connect(), not on import.
+
+    Until it is connected, methods that need Weaviate raise a 503 and the
+    server runs in degraded mode.
+    """
+
     def __init__(self):
+        self._client = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._client is not None
+
+    @property
+    def client(self):
+        if self._client is None:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Weaviate is not connected yet: {self.last_error or 'connecting'}",
+                headers={"Retry-After": str(int(WEAVIATE_CONNECT_RETRY_MAX))}
+            )
+        return self._client
+
+    def connect(self):
+        """Open the connection and ensure the schema; blocking, raises on failure."""
+        if self._client is not None:
+            return
         try:
             # Get Weaviate cloud credentials from environment variables
             weaviate_url = os.getenv("WEAVIATE_URL")
             weaviate_api_key = os.getenv("WEAVIATE_API_KEY")
-            
+
             if not weaviate_url or not weaviate_api_key:
                 raise ValueError("WEAVIATE_URL and WEAVIATE_API_KEY environment variables must be set")
 
             # Connect to Weaviate Cloud
-            self.client = weaviate.connect_to_weaviate_cloud(
+            client = weaviate.connect_to_weaviate_cloud(
                 cluster_url=weaviate_url,
                 auth_credentials=wvc.init.Auth.api_key(weaviate_api_key),
                 skip_init_checks=True
             )
-            print(f"self.client {self.client.is_ready()}")
-            self._ensure_schema()
+            try:
+                if not client.is_ready():
+                    raise WeaviateConnectionError("Weaviate is not ready")
+                self._ensure_schema(client)
+            except Exception:
+                client.close()
+                raise
+            self._client = client
+            self.last_error = None
         except Exception as e:
-            print(f"Failed to initialize Weaviate client: {e}")
+            self.last_error = str(e.detail) if isinstance(e, HTTPException) else str(e)
+            print(f"Failed to initialize Weaviate client: {self.last_error}")
             raise
 
-    def _ensure_schema(self):
+    async def connect_with_retry(self, attempts: Optional[int] = None):
+        """Connect off the event loop, retrying with exponential backoff.
+
+        Retries until connected, or at most `attempts` times and then re-raises.
+        """
+        delay = WEAVIATE_CONNECT_RETRY_BASE
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                await asyncio.to_thread(self.connect)
+                print(f"Connected to Weaviate after {attempt} attempt(s)")
+                return
+            except Exception:
+                if attempts is not None and attempt >= attempts:
+                    raise
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WEAVIATE_CONNECT_RETRY_MAX)
+
+    async def wait_ready(self, poll_interval: float = 0.5):
+        """Wait until connected."""
+        while self._client is None:
+            await asyncio.sleep(poll_interval)
+
+    def require_ready(self):
+        """FastAPI dependency that rejects requests with a 503 while Weaviate is not connected."""
+        self.client
+
+    def _ensure_schema(self, client):
         """Ensure the required schema exists in Weaviate"""
         try:
             # Check if collection exists
-            if not self.client.collections.exists("NovelChunk"):
+            if not client.collections.exists("NovelChunk"):
                 # Create collection if it doesn't exist
-                self.client.collections.create(
+                client.collections.create(
                     name="NovelChunk",
                     description="A collection to store novel text chunks and their embeddings",
                     vectorizer_config=wvc.config.Configure.Vectorizer.none(),  # we provide our own vectors
@@ -78,9 +198,17 @@ class WeaviateClient:
                             name="chunk_index",
                             data_type=wvc.config.DataType.INT,
                             description="Index of chunk within document"
-                        )
+                        ),
+                        *ADDED_PROPERTIES
                     ]
                 )
+            else:
+                # Collections created by earlier versions need newer properties added
+                collection = client.collections.get("NovelChunk")
+                existing = {prop.name for prop in collection.config.get().properties}
+                for prop in ADDED_PROPERTIES:
+                    if prop.name not in existing:
+                        collection.config.add_property(prop)
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to ensure schema: {str(e)}")
 
@@ -111,158 +239,349 @@ class WeaviateClient:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to add document: {str(e)}")
 
-    async def add_documents_batch(self, documents: List[Dict[str, Any]], embeddings: List[List[float]]):
-        """Batch insert multiple document chunks with their embeddings."""
+    def batch_writer(self, **options) -> BatchWriter:
+        """Open a long-lived batch writer, e.g. one per ingestion job; options override the WEAVIATE_BATCH_* settings."""
+        return BatchWriter(self.client.collections.get("NovelChunk"), **options)
+
+    async def add_documents_batch(
+        self,
+        documents: List[Dict[str, Any]],
+        embeddings: List[List[float]],
+        uuids: Optional[List[str]] = None
+    ):
+        """Batch insert multiple document chunks with their embeddings.
+
+        When uuids are given they become the object ids, so re-inserting the same
+        chunks overwrites them instead of duplicating them. For many inserts, keep
+        one batch_writer open instead of calling this repeatedly.
+        """
         if not documents or not embeddings:
             print("No documents or embeddings to add in batch.")
             return
-        if len(documents) != len(embeddings):
-            # Log this error as it's a programming mistake
-            print(f"Error: Mismatch in lengths of documents ({len(documents)}) and embeddings ({len(embeddings)}) lists.")
-            raise ValueError("The number of documents and embeddings must be the same for batch insertion.")
 
+        # doc_properties must only hold NovelChunk schema properties; the object id
+        # and vector are passed separately, never as 'id' or 'vector' properties.
+        writer = self.batch_writer()
         try:
-            collection = self.client.collections.get("NovelChunk")
-            
-            # Using Weaviate's recommended context manager for batching
-            with collection.batch.dynamic() as batch:
-                for doc_properties, vector_embedding in zip(documents, embeddings):
-                    # doc_properties should be a dictionary containing only the keys 
-                    # defined in the 'NovelChunk' schema's properties.
-                    # These are: "content", "page", "start_line", "end_line", 
-                    # "document_id", "filename", "chunk_index".
-                    #
-                    # The error "It is forbidden to insert id or vector inside properties"
-                    # means that 'doc_properties' itself must not contain a key named 'id' or 'vector'.
-                    # Such keys must be handled by the caller (e.g., in routes/documents.py)
-                    # to ensure they are not passed within the properties dictionary.
-                    # If a specific UUID is intended, it should be passed as the `uuid` parameter
-                    # to `batch.add_object`, not within `doc_properties`.
-
-                    batch.add_object(
-                        properties=doc_properties,
-                        vector=vector_embedding
-                        # If you have specific UUIDs:
-                        # uuid=doc_properties.pop('your_uuid_key_if_any', None)
-                        # Ensure 'your_uuid_key_if_any' is then not in doc_properties.
-                    )
-            
-            # The batch is automatically executed when the 'with' block exits.
-            # Successful execution means no exceptions were raised during the batch operations.
-            # Weaviate client v4 handles batch errors by raising exceptions.
-
+            await writer.add(documents, embeddings, uuids)
+            await writer.flush()
         except WeaviateConnectionError as e:
             print(f"Weaviate connection error during batch insert: {type(e).__name__} - {e}")
             traceback.print_exc()
             raise HTTPException(status_code=503, detail=f"Weaviate service unavailable during batch insert: {str(e)}")
-        except ValueError as e: # Catch the ValueError we might raise
+        except ValueError as e:
+            # Mismatched list lengths are a programming mistake
+            print(f"Error: {e}")
             raise HTTPException(status_code=400, detail=str(e))
-        except Exception as e: 
+        except HTTPException:
+            raise
+        except Exception as e:
             print(f"Error during batch document insertion: {type(e).__name__} - {e}")
-            traceback.print_exc() 
-            # The original error "It is forbidden to insert id or vector inside properties"
-            # strongly indicates an issue with the structure of `doc_properties`.
-            # The calling code (likely in routes/documents.py) must ensure that the dictionaries
-            # passed as `documents` (which become `doc_properties` here)
-            # do not contain 'id' or 'vector' keys.
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Failed to batch add documents. This might be due to 'properties' dictionaries containing reserved keys like 'id' or 'vector', or other schema mismatches. Original error: {type(e).__name__} - {str(e)}"
-            )
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"Failed to batch add documents: {type(e).__name__} - {str(e)}")
+        finally:
+            await writer.close()
+
+    async def search_similar(
+        self,
+        query_embedding: List[float],
+        document_id: Optional[str] = None,
+        limit: int = 5,
+        return_properties: Sequence[str] = SEARCH_PROPERTIES,
+        include_vector: bool = False,
+        exclude_document_ids: Sequence[str] = ()
+    ) -> List[RetrievedChunk]:
+        """Search for similar chunks using the query embedding, optionally filtered by document_id.
 
-    async def search_similar(self, query_embedding: List[float], document_id: Optional[str] = None, limit: int = 5) -> Any:
-        """Search for similar documents using the query embedding, optionally filtered by document_id."""
+        Only `return_properties` are fetched, and vectors only when `include_vector` is set.
+        Chunks of `exclude_document_ids` (e.g. documents being deleted) are never returned.
+        """
         try:
             collection = self.client.collections.get("NovelChunk")
-            
+            conditions = []
             if document_id:
-                # Use the correct Weaviate v4 syntax: use filters parameter in near_vector
-                response = collection.query.near_vector(
-                    near_vector=query_embedding,
-                    limit=limit,
-                    return_metadata=["distance"],
-                    filters=wvc.query.Filter.by_property("document_id").equal(document_id)
+                conditions.append(document_filter(document_id))
+            for excluded_id in exclude_document_ids:
+                conditions.append(wvc.query.Filter.by_property("document_id").not_equal(excluded_id))
+            filters = wvc.query.Filter.all_of(conditions) if conditions else None
+
+            response = collection.query.near_vector(
+                near_vector=query_embedding,
+                limit=limit,
+                filters=filters,
+                return_properties=list(return_properties),
+                return_metadata=wvc.query.MetadataQuery(distance=True),
+                include_vector=include_vector
+            )
+            return [_to_retrieved_chunk(obj) for obj in response.objects]
+        except Exception as e:
+            print(f"Error in search_similar: {type(e).__name__} - {e}")
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"Failed to search documents: {str(e)}")
+
+    async def count_document_chunks(self, document_id: str) -> int:
+        """Count the chunks a document owns or shares with a server-side aggregate."""
+        def aggregate() -> int:
+            collection = self.client.collections.get("NovelChunk")
+            return collection.aggregate.over_all(filters=document_filter(document_id), total_count=True).total_count or 0
+
+        try:
+            return await asyncio.to_thread(aggregate)
+        except Exception as e:
+            print(f"Error in count_document_chunks: {type(e).__name__} - {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to count document chunks: {str(e)}")
+
+    async def count_chunks_by_document(self, group_limit: int = 100000) -> Dict[str, Dict[str, Any]]:
+        """Count chunks per document with server-side aggregates, without fetching any objects.
+
+        Shared chunks keep the first owner in document_id and list every
+        document in document_ids, so documents are counted over document_ids.
+        Chunks stored before document_ids existed only have an owner; a
+        document's count is the larger of the two group-bys.
+        """
+        def aggregate(prop: str):
+            collection = self.client.collections.get("NovelChunk")
+            return collection.aggregate.over_all(
+                group_by=wvc.aggregate.GroupByAggregate(prop=prop, limit=group_limit),
+                total_count=True,
+                return_metrics=wvc.aggregate.Metrics("filename").text(top_occurrences_value=True, limit=1)
+            )
+
+        try:
+            counts = {}
+            for prop in ("document_id", "document_ids"):
+                # The aggregation can take a while on large collections, keep it off the event loop
+                response = await asyncio.to_thread(aggregate, prop)
+                for group in response.groups:
+                    filename_metrics = group.properties.get("filename")
+                    filename = ""
+                    if filename_metrics is not None and filename_metrics.top_occurrences:
+                        filename = filename_metrics.top_occurrences[0].value or ""
+                    document_id = str(group.grouped_by.value)
+                    info = counts.setdefault(document_id, {"chunk_count": 0, "filename": filename})
+                    info["chunk_count"] = max(info["chunk_count"], group.total_count or 0)
+            return counts
+        except Exception as e:
+            print(f"Error in count_chunks_by_document: {type(e).__name__} - {e}")
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"Failed to aggregate chunk counts: {str(e)}")
+
+    def _release_objects(self, collection, document_id: str, objects) -> int:
+        """Drop document_id from shared chunks and delete chunks no other document uses.
+
+        Returns the number of chunks deleted.
+        """
+        delete_ids = []
+        for obj in objects:
+            others = [doc_id for doc_id in (obj.properties.get("document_ids") or []) if doc_id != document_id]
+            if others:
+                collection.data.update(
+                    uuid=obj.uuid,
+                    properties={"document_ids": others, "document_id": others[0]}
                 )
             else:
-                response = collection.query.near_vector(
-                    near_vector=query_embedding,
-                    limit=limit,
-                    return_metadata=["distance"]
+                delete_ids.append(obj.uuid)
+        if delete_ids:
+            collection.data.delete_many(where=wvc.query.Filter.by_id().contains_any(delete_ids))
+        return len(delete_ids)
+
+    async def delete_document(
+        self,
+        document_id: str,
+        batch_size: int = 500,
+        on_batch: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """Delete all chunks of a document in batches, calling on_batch with each batch's size.
+
+        Each batch fetches up to batch_size chunk ids and deletes them by id, in a
+        worker thread, so large documents never block the event loop. Chunks shared
+        with other documents are kept and only lose this document's reference.
+        Returns the number of chunks released.
+        """
+        def delete_batch() -> int:
+            collection = self.client.collections.get("NovelChunk")
+            with hold_lock(CHUNK_REFERENCES_LOCK):
+                response = collection.query.fetch_objects(
+                    filters=document_filter(document_id),
+                    limit=batch_size,
+                    return_properties=["document_ids"]
                 )
-                
-            return response.objects if hasattr(response, 'objects') else []
+                self._release_objects(collection, document_id, response.objects)
+            return len(response.objects)
+
+        released = 0
+        try:
+            while True:
+                count = await asyncio.to_thread(delete_batch)
+                if count == 0:
+                    return released
+                released += count
+                if on_batch:
+                    on_batch(count)
         except Exception as e:
-            print(f"Error in search_similar: {type(e).__name__} - {e}")
+            print(f"Error deleting document {document_id}: {type(e).__name__} - {e}")
             traceback.print_exc()
-            raise HTTPException(status_code=500, detail=f"Failed to search documents: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Failed to delete document: {str(e)}")
+
+    async def list_document_chunks(self, document_id: str, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """List ids, hash and position of the chunks a document owns or shares, without content or vectors.
+
+        Pages by chunk_index because cursor pagination cannot be combined with filters.
+        """
+        properties = ["content_hash", "chunk_index", "page", "start_line", "end_line", "filename", "document_id"]
+
+        def fetch_page(from_index: int):
+            collection = self.client.collections.get("NovelChunk")
+            return collection.query.fetch_objects(
+                filters=(
+                    document_filter(document_id)
+                    & wvc.query.Filter.by_property("chunk_index").greater_or_equal(from_index)
+                ),
+                sort=wvc.query.Sort.by_property("chunk_index", ascending=True),
+                limit=page_size,
+                return_properties=properties
+            ).objects
 
-    async def list_documents(self) -> List[Dict[str, Any]]:
-        """List all documents in the store"""
         try:
-            collection = weaviate_client.client.collections.get("NovelChunk")
-            response = collection.query.fetch_objects(limit=10)
-    
-            # Group by document_id
-            document_map = {}
-            for obj in response.objects:
-                props = obj.properties
-                doc_id = props.get("document_id", "")
-                filename = props.get("filename", "")
-                
-                if doc_id not in document_map:
-                    document_map[doc_id] = {
-                        "id": doc_id,
-                        "filename": filename,
-                        "chunk_count": 0
-                    }
-                document_map[doc_id]["chunk_count"] += 1
-            documents = []
-            for doc_data in document_map.values():
-                documents.append(DocumentInfo(
-                    id=doc_data["id"],
-                    filename=doc_data["filename"],
-                    chunk_count=doc_data["chunk_count"],
-                    upload_date="Unknown"  # You might want to add timestamp to schema
-                ))
-            return documents
+            chunks = {}
+            from_index = 0
+            while True:
+                objects = await asyncio.to_thread(fetch_page, from_index)
+                new_objects = [obj for obj in objects if str(obj.uuid) not in chunks]
+                if not new_objects:
+                    return list(chunks.values())
+                for obj in new_objects:
+                    chunks[str(obj.uuid)] = {"uuid": str(obj.uuid), **{name: obj.properties.get(name) for name in properties}}
+                # Re-read the last index, a partially applied update can leave duplicates of it
+                from_index = new_objects[-1].properties.get("chunk_index") or 0
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to list documents: {str(e)}")
+            print(f"Error listing chunks of {document_id}: {type(e).__name__} - {e}")
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"Failed to list document chunks: {str(e)}")
+
+    async def update_chunk_properties(self, updates: List[Dict[str, Any]], concurrency: int = 16):
+        """Apply property-only updates ({"uuid": ..., "properties": {...}}) without touching vectors."""
+        def update(item: Dict[str, Any]):
+            collection = self.client.collections.get("NovelChunk")
+            collection.data.update(uuid=item["uuid"], properties=item["properties"])
 
-    async def delete_all_documents(self):
-        """Delete all documents from the store"""
         try:
-            if self.client.collections.exists("NovelChunk"):
-                collection = self.client.collections.get("NovelChunk")
-                # Delete all objects in the collection
-                collection.data.delete_many()
+            for i in range(0, len(updates), concurrency):
+                await asyncio.gather(*(asyncio.to_thread(update, item) for item in updates[i:i + concurrency]))
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to delete documents: {str(e)}")
+            print(f"Error updating chunk properties: {type(e).__name__} - {e}")
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"Failed to update chunks: {str(e)}")
+
+    async def add_chunk_references(self, document_id: str, uuids: List[str]) -> List[str]:
+        """Add document_id to the document_ids of existing chunks, returning the ids no longer stored.
+
+        document_ids is re-read and merged under the chunk references lock, so
+        jobs sharing the same chunk at once, or a release running meanwhile,
+        cannot overwrite each other's references.
+        """
+        if not uuids:
+            return []
+
+        def add() -> List[str]:
+            collection = self.client.collections.get("NovelChunk")
+            with hold_lock(CHUNK_REFERENCES_LOCK):
+                objects = collection.query.fetch_objects(
+                    filters=wvc.query.Filter.by_id().contains_any(list(uuids)),
+                    limit=len(uuids),
+                    return_properties=["document_id", "document_ids"]
+                ).objects
+                for obj in objects:
+                    # Chunks stored before sharing only have their owner
+                    document_ids = obj.properties.get("document_ids") or [obj.properties.get("document_id")]
+                    if document_id not in document_ids:
+                        collection.data.update(uuid=obj.uuid, properties={"document_ids": [*document_ids, document_id]})
+            found = {str(obj.uuid) for obj in objects}
+            return [chunk_uuid for chunk_uuid in uuids if chunk_uuid not in found]
 
-    async def delete_document(self, document_id: str):
-        """Delete a specific document and all its chunks"""
         try:
-            if self.client.collections.exists("NovelChunk"):
-                collection = self.client.collections.get("NovelChunk")
-                # Delete all chunks for this document using correct Weaviate v4 syntax
-                collection.data.delete_many(
-                    where=wvc.query.Filter.by_property("document_id").equal(document_id)
+            return await asyncio.to_thread(add)
+        except Exception as e:
+            print(f"Error adding chunk references: {type(e).__name__} - {e}")
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"Failed to share chunks: {str(e)}")
+
+    async def release_chunks(self, document_id: str, uuids: List[str], batch_size: int = 500) -> int:
+        """Remove document_id from the given chunks, deleting those left without any document."""
+        def release_batch(ids: List[str]) -> int:
+            collection = self.client.collections.get("NovelChunk")
+            with hold_lock(CHUNK_REFERENCES_LOCK):
+                response = collection.query.fetch_objects(
+                    filters=wvc.query.Filter.by_id().contains_any(ids),
+                    limit=len(ids),
+                    return_properties=["document_ids"]
                 )
+                return self._release_objects(collection, document_id, response.objects)
+
+        try:
+            deleted = 0
+            for i in range(0, len(uuids), batch_size):
+                deleted += await asyncio.to_thread(release_batch, uuids[i:i + batch_size])
+            return deleted
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to delete document: {str(e)}")
+            print(f"Error releasing chunks: {type(e).__name__} - {e}")
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"Failed to delete chunks: {str(e)}")
+
+    async def find_chunk_refs(
+        self,
+        content_hashes: Sequence[str] = (),
+        uuids: Sequence[str] = ()
+    ) -> List[Dict[str, Any]]:
+        """Look up existing chunks by content hash or id, returning their document references only."""
+        if not content_hashes and not uuids:
+            return []
+
+        def fetch():
+            collection = self.client.collections.get("NovelChunk")
+            if content_hashes:
+                filters = wvc.query.Filter.by_property("content_hash").contains_any(list(content_hashes))
+            else:
+                filters = wvc.query.Filter.by_id().contains_any(list(uuids))
+            return collection.query.fetch_objects(
+                filters=filters,
+                # A hash can match several chunks stored before deduplication existed
+                limit=max(len(content_hashes) * 4, len(uuids)),
+                return_properties=["content_hash", "document_id", "document_ids"]
+            ).objects
+
+        try:
+            objects = await asyncio.to_thread(fetch)
+            return [
+                {
+                    "uuid": str(obj.uuid),
+                    "content_hash": obj.properties.get("content_hash"),
+                    "document_id": obj.properties.get("document_id"),
+                    # Chunks stored before sharing only have their owner
+                    "document_ids": obj.properties.get("document_ids") or [obj.properties.get("document_id")]
+                }
+                for obj in objects
+            ]
+        except Exception as e:
+            print(f"Error looking up chunks: {type(e).__name__} - {e}")
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"Failed to look up chunks: {str(e)}")
 
     async def check_weaviate_connection(self) -> bool:
         """Check if Weaviate is accessible"""
         try:
-            if not self.client:
+            if not self._client:
                 return False
-            return self.client.is_ready()
+            # is_ready() is a blocking HTTP call
+            return await asyncio.to_thread(self._client.is_ready)
         except:
             return False
 
     def close(self):
         """Close the Weaviate connection"""
-        if self.client:
-            self.client.close()
+        if self._client:
+            self._client.close()
+            self._client = None
 
 # Create a singleton instance
 weaviate_client = WeaviateClient()
\ No newline at end of file
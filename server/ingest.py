@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""Offline bulk ingestion of a directory of PDF/TXT documents.
+
+Text extraction and chunking run in a process pool. Embedding and storage use
+the server's ingestion pipeline: persisted jobs, the shared ingestion pool and
+cross-file embedding batches. Use --dry-run to only chunk and report capacity.
+
+    python ingest.py ~/library [--chunk-size 512] [--chunk-overlap 50] [--chunk-unit tokens] [--dry-run]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+# Add the server directory to the Python path
+server_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, server_dir)
+
+DOCUMENT_EXTENSIONS = (".pdf", ".txt")
+
+
+def find_documents(root: str):
+    """Walk root for documents, skipping hidden files and directories, in a stable order."""
+    paths = []
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories[:] = sorted(d for d in subdirectories if not d.startswith("."))
+        for filename in sorted(filenames):
+            if filename.lower().endswith(DOCUMENT_EXTENSIONS) and not filename.startswith("."):
+                paths.append(os.path.join(directory, filename))
+    return paths
+
+
+def plan_file(
+    path: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str,
+    chunker: str,
+    keep_content: bool = True
+):
+    """Extract and chunk one file in a worker process; returns (path, content, byte size, plan, error, seconds).
+
+    Semantic chunking needs the server's embedding pipeline, so for it the
+    worker only extracts and the plan is the extracted text.
+    """
+    from core.planning import extract_text, plan_chunks
+
+    started = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+        plan = extract_text(path, content)
+        if chunker == "recursive":
+            plan = plan_chunks(plan, chunk_size, chunk_overlap, chunk_unit)
+        # Dry runs only need the size, so skip sending the file back to the parent
+        return path, content if keep_content else None, len(content), plan, None, time.perf_counter() - started
+    except Exception as e:
+        return path, None, 0, None, str(e), time.perf_counter() - started
+
+
+def iter_plans(paths, args, keep_content: bool = True):
+    # spawn keeps the workers free of the parent's Weaviate connection
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=get_context("spawn")) as executor:
+        futures = [
+            executor.submit(
+                plan_file, path, args.chunk_size, args.chunk_overlap, args.chunk_unit, args.chunker, keep_content
+            )
+            for path in paths
+        ]
+        for future in futures:
+            yield future.result()
+
+
+def format_rate(count: float, seconds: float, unit: str) -> str:
+    return f"{count / seconds:,.1f} {unit}/s" if seconds > 0 else f"- {unit}/s"
+
+
+def dry_run(paths, args):
+    started = time.perf_counter()
+    files = chunks = chars = total_bytes = 0
+    for path, _, byte_size, plan, error, seconds in iter_plans(paths, args, keep_content=False):
+        name = os.path.relpath(path, args.directory)
+        if error:
+            print(f"  skipped {name}: {error}")
+            continue
+        files += 1
+        total_bytes += byte_size
+        chunks += len(plan["chunks"])
+        chars += sum(len(chunk["text"]) for chunk in plan["chunks"])
+        if args.verbose:
+            print(f"  {name}: {len(plan['chunks'])} chunks, {byte_size:,} bytes, {seconds:.2f}s")
+    elapsed = time.perf_counter() - started
+
+    print(f"Files:      {files} chunked, {len(paths) - files} skipped")
+    print(f"Input:      {total_bytes / 1e6:,.1f} MB in {elapsed:.1f}s ({format_rate(total_bytes / 1e6, elapsed, 'MB')}, {args.workers} workers)")
+    print(f"Chunks:     {chunks:,} (avg {chars / chunks if chunks else 0:,.0f} chars)")
+    print(f"Vectors:    ~{chunks * args.embedding_dim * 4 / 1e6:,.1f} MB at {args.embedding_dim} float32 dimensions")
+
+
+async def ingest(paths, args):
+    from core.embedding_batcher import embedding_batcher
+    from core.ingestion import create_ingestion_job, plan_document
+    from core.ingestion_pool import ingestion_pool
+    from db.job_store import ingestion_job_store
+    from db.weaviate_client import weaviate_client
+
+    # Fail fast rather than planning a whole library for an unreachable database
+    await weaviate_client.connect_with_retry(attempts=3)
+    ingestion_pool.workers = args.concurrency
+    started = time.perf_counter()
+    job_ids = []
+    total_bytes = 0
+    skipped = 0
+    try:
+        plans = iter_plans(paths, args)
+        while True:
+            # Planning blocks on the process pool; keep the event loop free for running jobs
+            result = await asyncio.to_thread(next, plans, None)
+            if result is None:
+                break
+            path, content, byte_size, plan, error, _ = result
+            name = os.path.relpath(path, args.directory)
+            if error:
+                skipped += 1
+                print(f"  skipped {name}: {error}")
+                continue
+            if isinstance(plan, str):
+                plan = await plan_document(plan, args.chunk_size, args.chunk_overlap, args.chunk_unit, args.chunker)
+            job = create_ingestion_job(
+                name, content, args.chunk_size, args.chunk_overlap,
+                plan=plan, chunk_unit=args.chunk_unit, chunker=args.chunker
+            )
+            ingestion_pool.submit(job["id"])
+            job_ids.append(job["id"])
+            total_bytes += byte_size
+        planned = time.perf_counter() - started
+        await ingestion_pool.join()
+    finally:
+        await ingestion_pool.shutdown()
+        weaviate_client.close()
+    elapsed = time.perf_counter() - started
+
+    jobs = [ingestion_job_store.get(job_id) for job_id in job_ids]
+    failed = [job for job in jobs if job["status"] != "completed"]
+    for job in failed:
+        print(f"  failed {job['filename']}: {job['error']} (retry with POST /ingestion/jobs/{job['id']}/retry)")
+    chunks = sum(job["committed_chunks"] for job in jobs)
+    deduplicated = sum(job["deduplicated_chunks"] for job in jobs)
+    stats = embedding_batcher.stats
+
+    print(f"Files:      {len(jobs) - len(failed)} ingested, {len(failed)} failed, {skipped} skipped")
+    print(f"Input:      {total_bytes / 1e6:,.1f} MB, extraction finished after {planned:.1f}s")
+    print(f"Chunks:     {chunks:,} stored in {elapsed:.1f}s ({format_rate(chunks, elapsed, 'chunks')}), {deduplicated:,} deduplicated")
+    print(
+        f"Embeddings: {stats['embedded']:,} embedded in {stats['calls']:,} calls "
+        f"(avg batch {stats['embedded'] / stats['calls'] if stats['calls'] else 0:.1f}), "
+        f"{stats['cache_hits']:,} cache hits, {stats['coalesced']:,} coalesced"
+    )
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="directory to walk for .pdf and .txt files")
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument(
+        "--chunk-unit", choices=("chars", "tokens"), default=None,
+        help="unit of --chunk-size and --chunk-overlap (default CHUNK_UNIT)"
+    )
+    parser.add_argument(
+        "--chunker", choices=("recursive", "semantic"), default=None,
+        help="recursive splits by size, semantic at topic shifts using embeddings (default CHUNKER)"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="extraction processes")
+    parser.add_argument("--concurrency", type=int, default=None, help="ingestion jobs at once (default INGEST_CONCURRENCY)")
+    parser.add_argument("--dry-run", action="store_true", help="only extract and chunk, without embedding or storing")
+    parser.add_argument("--embedding-dim", type=int, default=768, help="vector size for the dry-run storage estimate")
+    parser.add_argument("--verbose", action="store_true", help="print per-file results")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"not a directory: {args.directory}")
+    paths = find_documents(args.directory)
+    if not paths:
+        print(f"No {', '.join(DOCUMENT_EXTENSIONS)} files found in {args.directory}")
+        return 0
+    print(f"Found {len(paths)} documents in {args.directory}")
+    if args.chunk_unit is None:
+        from utils.text_processing import CHUNK_UNIT
+        args.chunk_unit = CHUNK_UNIT
+    if args.chunker is None:
+        from utils.text_processing import CHUNKER
+        args.chunker = CHUNKER
+    if args.dry_run and args.chunker == "semantic":
+        parser.error("--dry-run does not embed, so it only supports --chunker recursive")
+
+    if args.dry_run:
+        dry_run(paths, args)
+        return 0
+    if args.concurrency is None:
+        from core.ingestion_pool import INGEST_CONCURRENCY
+        args.concurrency = INGEST_CONCURRENCY
+    return asyncio.run(ingest(paths, args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
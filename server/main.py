@@ -1,13 +1,94 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routes import query, documents, health
+from utils.serialization import FastJSONResponse
+from core.catalog_sync import reconcile_catalog_on_startup
+from core.deletion import resume_deletions
+from core.ingestion import INGEST_MODE, resume_ingestion_jobs
+from core.bulk_ingestion import resume_bulk_jobs
+from core.ingestion_pool import ingestion_pool
+from core.query_jobs import query_jobs
+from core.health import health_prober
+from db.weaviate_client import weaviate_client
+from db.local_store import try_lock
+import asyncio
 import os
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-app = FastAPI(title="Novel RAG Chatbot API")
+# How long startup waits for Weaviate before serving in degraded mode; connecting continues in the background
+WEAVIATE_STARTUP_WAIT = float(os.getenv("WEAVIATE_STARTUP_WAIT", "10"))
+# Fail startup instead of serving degraded when Weaviate is not connected within the wait
+WEAVIATE_REQUIRED = os.getenv("WEAVIATE_REQUIRED", "false").lower() == "true"
+# How often the maintenance worker looks for jobs left behind by a stopped server worker
+MAINTENANCE_INTERVAL = float(os.getenv("MAINTENANCE_INTERVAL", "30"))
+
+background_tasks = set()
+# Held by the one server worker that runs catalog maintenance
+maintenance_lock = None
+
+def _start_background(job):
+    task = asyncio.create_task(job)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def run_catalog_maintenance():
+    """Once Weaviate is connected, reconcile the catalog and finish interrupted deletions and ingestions.
+
+    With several server workers only the one holding the maintenance lock does
+    this; the others keep trying in case it stops. The holder then keeps picking
+    up jobs that a stopped worker left queued or running, unless INGEST_MODE is
+    external and worker.py runs them.
+    """
+    global maintenance_lock
+    await weaviate_client.wait_ready()
+    while True:
+        if maintenance_lock is None:
+            maintenance_lock = try_lock("maintenance")
+            if maintenance_lock is not None:
+                for job in (reconcile_catalog_on_startup(weaviate_client), resume_deletions(weaviate_client)):
+                    _start_background(job)
+        if maintenance_lock is not None and INGEST_MODE != "external":
+            try:
+                await resume_ingestion_jobs()
+            except Exception as e:
+                print(f"Resuming ingestion jobs failed: {e}")
+            # Planning runs long; bulk uploads already being planned here are skipped
+            _start_background(resume_bulk_jobs())
+        await asyncio.sleep(MAINTENANCE_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect to Weaviate with retries; serve in degraded mode until it is connected"""
+    connection = _start_background(weaviate_client.connect_with_retry())
+    health_prober.start()
+    try:
+        await asyncio.wait_for(asyncio.shield(connection), WEAVIATE_STARTUP_WAIT)
+    except asyncio.TimeoutError:
+        if WEAVIATE_REQUIRED:
+            connection.cancel()
+            raise RuntimeError(f"Weaviate not connected after {WEAVIATE_STARTUP_WAIT:g}s: {weaviate_client.last_error}")
+        print(f"Starting in degraded mode, still connecting to Weaviate: {weaviate_client.last_error}")
+    _start_background(run_catalog_maintenance())
+
+    yield
+
+    tasks = list(background_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await health_prober.stop()
+    await ingestion_pool.shutdown()
+    await query_jobs.shutdown()
+    weaviate_client.close()
+    if maintenance_lock is not None:
+        maintenance_lock.close()
+
+app = FastAPI(title="Novel RAG Chatbot API", default_response_class=FastJSONResponse, lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -4,6 +4,7 @@ from typing import List, Dict, Any, Optional
 class QueryRequest(BaseModel):
     question: str
     document_id: Optional[str] = None  # Optional: query specific document
+    mode: str = "stream"  # "stream" answers inline, "job" returns a job id to poll or stream later
     
 class DocumentChunk(BaseModel):
     text: str
@@ -14,10 +15,22 @@ class StreamingResponse(BaseModel):
     references: List[str]
     done: bool
     
+class QueryJobStatus(BaseModel):
+    job_id: str
+    status: str
+    answer: str
+    offset: int
+    references: List[Dict[str, Any]]
+    error: Optional[str]
+    created_at: float
+    finished_at: Optional[float]
+
 class HealthResponse(BaseModel):
     status: str
     ollama_status: bool
     weaviate_status: bool
+    checked_at: Optional[float] = None  # when the oldest of the reported probes ran
+    dependencies: Optional[Dict[str, Any]] = None  # per-dependency probe latency and history
 
 class ProcessingStatus(BaseModel):
     status: str
@@ -25,9 +38,50 @@ class ProcessingStatus(BaseModel):
     total_chunks: int
     processed_chunks: int
     current_document: Optional[str]
+    embedding_concurrency: Optional[Dict[str, Any]] = None  # adaptive limit on concurrent Ollama embed calls
+
+class IngestionJobInfo(BaseModel):
+    id: str
+    document_id: str
+    filename: str
+    mode: str  # create or update
+    status: str  # queued, running, completed, error
+    total_chunks: int
+    committed_chunks: int
+    committed_batches: int
+    deduplicated_chunks: int = 0  # planned chunks stored by referencing an existing chunk
+    error: Optional[str]
+    parent_id: Optional[str] = None  # bulk upload this file belongs to
+    created_at: float
+    updated_at: float
+
+class BulkFileStatus(BaseModel):
+    id: str
+    document_id: str
+    filename: str
+    status: str  # queued, running, completed, error
+    total_chunks: int
+    committed_chunks: int
+    error: Optional[str]
+
+class BulkIngestionJobInfo(BaseModel):
+    id: str
+    status: str  # running, completed, completed_with_errors, error
+    total_files: int
+    planned_files: int
+    files_by_status: Dict[str, int]
+    total_chunks: int
+    committed_chunks: int
+    skipped: List[Dict[str, str]]  # files that could not be extracted, with the reason
+    files: List[BulkFileStatus]
+    created_at: float
+    updated_at: float
 
 class DocumentInfo(BaseModel):
     id: str
     filename: str
     chunk_count: int
     upload_date: str
+    byte_size: int = 0
+    embed_model: Optional[str] = None
+    status: str = "ready"  # processing, ready, error, deleting
@@ -0,0 +1,68 @@
+from typing import Any, Dict, List, Optional
+
+
+class RetrievedChunk:
+    """A single vector-search hit, holding only the properties retrieval asked for."""
+
+    __slots__ = (
+        "uuid",
+        "content",
+        "page",
+        "start_line",
+        "end_line",
+        "document_id",
+        "filename",
+        "chunk_index",
+        "distance",
+        "vector",
+        "relevance_score",
+    )
+
+    def __init__(
+        self,
+        uuid: Optional[str] = None,
+        content: str = "",
+        page: int = 0,
+        start_line: int = 0,
+        end_line: int = 0,
+        document_id: str = "",
+        filename: str = "",
+        chunk_index: int = 0,
+        distance: Optional[float] = None,
+        vector: Optional[List[float]] = None,
+        relevance_score: Optional[float] = None
+    ):
+        self.uuid = uuid
+        self.content = content
+        self.page = page
+        self.start_line = start_line
+        self.end_line = end_line
+        self.document_id = document_id
+        self.filename = filename
+        self.chunk_index = chunk_index
+        self.distance = distance
+        self.vector = vector
+        self.relevance_score = relevance_score  # keyword overlap set by compression
+
+    @property
+    def similarity_score(self) -> float:
+        return round(1 - (self.distance or 0), 3)
+
+    def replace(self, **changes) -> "RetrievedChunk":
+        """Return a copy with the given fields changed."""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        return RetrievedChunk(**fields)
+
+    def to_reference(self) -> Dict[str, Any]:
+        """Serialize to the reference payload sent with the final /query chunk."""
+        return {
+            'page': self.page,
+            'start_line': self.start_line,
+            'end_line': self.end_line,
+            'content': self.content,
+            'similarity_score': self.similarity_score
+        }
+
+    def __repr__(self) -> str:
+        return f"RetrievedChunk(uuid={self.uuid!r}, page={self.page}, chunk_index={self.chunk_index}, distance={self.distance})"
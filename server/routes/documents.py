@@ -1,137 +1,286 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, BackgroundTasks
+import asyncio
+from fastapi import APIRouter, HTTPException, UploadFile, File, BackgroundTasks, Query, Response, Depends
 from typing import List
-from models.api_models import DocumentChunk, ProcessingStatus, DocumentInfo
-from core.llm import get_embedding
+from models.api_models import DocumentChunk, ProcessingStatus, DocumentInfo, IngestionJobInfo, BulkIngestionJobInfo
 from db.weaviate_client import weaviate_client
-from utils.text_processing import chunk_document
-import asyncio
-import uuid
-from pypdf import PdfReader
+from db.catalog import document_catalog
+from db.job_store import ingestion_job_store
+from db.status_store import processing_status
+from core.catalog_sync import reconcile_catalog
+from core.deletion import delete_document_in_background, delete_all_in_background
+from core.ingestion import INGEST_MODE, create_ingestion_job, create_update_job, enqueue_ingestion_job, plan_document
+from core.planning import extract_text
+from core.ingestion_pool import ingestion_pool
+from core.concurrency import embedding_limiter
+from core.bulk_ingestion import create_bulk_job, plan_bulk_job, bulk_job_summary
+from utils.text_processing import CHUNK_UNIT, CHUNK_UNITS, CHUNKER, CHUNKERS
+from utils.tokenization import EMBED_CONTEXT_TOKENS
 
 router = APIRouter()
 
-# Processing status storage
-processing_status = {
-    "total_chunks": 0,
-    "processed_chunks": 0,
-    "status": "idle",  # idle, processing, completed, error
-    "current_document": None
-}
+# Routes that read or write Weaviate answer 503 until it is connected
+requires_weaviate = [Depends(weaviate_client.require_ready)]
+
+# With INGEST_MODE=external jobs are left unowned for worker.py instead of running here
+run_ingestion_here = INGEST_MODE != "external"
+
+def _dispatch(job_id: str):
+    """Run a queued job on this server's ingestion pool unless an ingestion worker picks it up."""
+    if run_ingestion_here:
+        ingestion_pool.submit(job_id)
 
-async def process_chunks(chunks: List[dict], document_id: str, filename: str):
-    """Process chunks in parallel batches using batch insert to Weaviate."""
+def _check_chunking(chunk_size: int, chunk_overlap: int, chunk_unit: str, chunker: str):
+    """Reject chunker settings that cannot produce sensible chunks."""
+    if chunker not in CHUNKERS:
+        raise HTTPException(status_code=400, detail=f"chunker must be one of {', '.join(CHUNKERS)}")
+    if chunk_unit not in CHUNK_UNITS:
+        raise HTTPException(status_code=400, detail=f"chunk_unit must be one of {', '.join(CHUNK_UNITS)}")
+    if chunk_size <= 0 or not 0 <= chunk_overlap < chunk_size:
+        raise HTTPException(status_code=400, detail="chunk_size must be positive and larger than chunk_overlap")
+    if chunk_unit == "tokens" and chunk_size > EMBED_CONTEXT_TOKENS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"chunk_size of {chunk_size} tokens exceeds the embedding context of {EMBED_CONTEXT_TOKENS} tokens"
+        )
+
+@router.post("/upload", dependencies=requires_weaviate)
+async def upload_document(
+    file: UploadFile = File(...),
+    chunk_size: int = 512,
+    chunk_overlap: int = 50,
+    chunk_unit: str = CHUNK_UNIT,
+    chunker: str = CHUNKER
+):
+    """Upload and process a text document with smart chunking"""
+    _check_chunking(chunk_size, chunk_overlap, chunk_unit, chunker)
     try:
-        processing_status["total_chunks"] = len(chunks)
-        processing_status["processed_chunks"] = 0
-        batch_size = 5  # Process 5 chunks at a time to avoid overloading
-
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i:i+batch_size]
-            tasks = []
-            valid_chunks = []
-            for chunk in batch:
-                if len(chunk['text']) >= 50:  # Skip very small chunks
-                    tasks.append(get_embedding(chunk['text']))
-                    valid_chunks.append(chunk)
-            if not valid_chunks:
-                continue
-            embeddings = await asyncio.gather(*tasks)
-            # Prepare document dicts for batch insert
-            documents = []
-            for chunk in valid_chunks:
-                documents.append({
-                    "content": chunk['text'],
-                    "document_id": document_id,
-                    "filename": filename,
-                    "page": chunk.get('page', 0),
-                    "start_line": chunk.get('start_line', 0),
-                    "end_line": chunk.get('end_line', 0),
-                    "chunk_index": chunk.get('chunk_index', 0)
-                })
-            await weaviate_client.add_documents_batch(documents, embeddings)
-            processing_status["processed_chunks"] += len(valid_chunks)
-        processing_status["status"] = "completed"
+        content = await file.read()
+
+        # Reset processing status
+        processing_status.update(
+            status="processing",
+            total_chunks=0,
+            processed_chunks=0,
+            current_document=file.filename
+        )
+
+        if not run_ingestion_here:
+            # The ingestion worker extracts, plans and embeds it; the document id is known once it is planned
+            job = await asyncio.to_thread(
+                enqueue_ingestion_job, file.filename, content, chunk_size, chunk_overlap, chunk_unit, chunker
+            )
+            return {
+                "message": f"Document queued for the ingestion worker. Use /ingestion/jobs/{job['id']} to monitor progress.",
+                "document_id": None,
+                "job_id": job["id"],
+                "filename": file.filename
+            }
+
+        # PDF extraction and the spool writes run in threads so the event loop keeps serving other requests
+        text = await asyncio.to_thread(extract_text, file.filename, content)
+        plan = await plan_document(text, chunk_size, chunk_overlap, chunk_unit, chunker)
+        # Spool the file and persist its chunk plan so the job survives a restart
+        job = await asyncio.to_thread(
+            create_ingestion_job,
+            file.filename, content, chunk_size, chunk_overlap, plan=plan, chunk_unit=chunk_unit, chunker=chunker
+        )
+
+        # Process chunks in the background on the shared ingestion pool
+        ingestion_pool.submit(job["id"])
+
+        return {
+            "message": f"Document upload started. Use the /status endpoint to monitor progress.",
+            "document_id": job["document_id"],
+            "job_id": job["id"],
+            "filename": file.filename
+        }
+
     except Exception as e:
-        processing_status["status"] = "error"
+        processing_status.update(status="error")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/upload")
-async def upload_document(
+@router.post("/upload/bulk", dependencies=requires_weaviate)
+async def upload_bulk(
     background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    chunk_size: int = 512,
+    chunk_overlap: int = 50,
+    chunk_unit: str = CHUNK_UNIT,
+    chunker: str = CHUNKER
+):
+    """Upload many documents, or zip/tar archives of them, as one aggregate ingestion job"""
+    _check_chunking(chunk_size, chunk_overlap, chunk_unit, chunker)
+    try:
+        uploads = [(file.filename, await file.read()) for file in files]
+        bulk = create_bulk_job(uploads, chunk_size, chunk_overlap, chunk_unit, chunker, claim=run_ingestion_here)
+
+        # Files are planned and queued one by one in the background, here or in the ingestion worker
+        if run_ingestion_here:
+            background_tasks.add_task(plan_bulk_job, bulk["id"])
+
+        return {
+            "message": f"Bulk upload started. Use /ingestion/bulk/{bulk['id']} to monitor progress.",
+            "bulk_id": bulk["id"],
+            "total_files": bulk["total_files"]
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/ingestion/bulk/{bulk_id}", response_model=BulkIngestionJobInfo)
+async def get_bulk_ingestion_job(bulk_id: str) -> BulkIngestionJobInfo:
+    """Get a bulk upload's aggregate status with the status of each file"""
+    summary = bulk_job_summary(bulk_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"Bulk upload not found: {bulk_id}")
+    return BulkIngestionJobInfo(**summary)
+
+@router.put("/documents/{document_id}", dependencies=requires_weaviate)
+async def update_document(
+    document_id: str,
     file: UploadFile = File(...),
     chunk_size: int = 512,
-    chunk_overlap: int = 50
+    chunk_overlap: int = 50,
+    chunk_unit: str = CHUNK_UNIT,
+    chunker: str = CHUNKER
 ):
-    """Upload and process a text document with smart chunking"""
+    """Replace a document with a new edition, embedding only chunks whose text changed"""
+    _check_chunking(chunk_size, chunk_overlap, chunk_unit, chunker)
+    document = document_catalog.get(document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"Document not found: {document_id}")
+    if document.status in ("processing", "deleting"):
+        raise HTTPException(status_code=409, detail=f"Document is {document.status}, try again later")
     try:
         content = await file.read()
-        # Detect file type by extension
-        if file.filename.lower().endswith('.pdf'):
-            # Use pypdf to extract text from PDF
-            from io import BytesIO
-            pdf_reader = PdfReader(BytesIO(content))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() or ""
-        else:
-            # Assume plain text
-            text = content.decode("utf-8")
-        document_id = str(uuid.uuid4())
-        
+
         # Reset processing status
-        processing_status.update({
-            "status": "processing",
-            "total_chunks": 0,
-            "processed_chunks": 0,
-            "current_document": file.filename
-        })
-        
-        # Create chunks using LangChain's improved chunking strategy
-        chunks = chunk_document(text, chunk_size, chunk_overlap)
-        
-        # Process chunks in the background
-        background_tasks.add_task(
-            process_chunks,
-            chunks,
-            document_id,
-            file.filename
+        processing_status.update(
+            status="processing",
+            total_chunks=0,
+            processed_chunks=0,
+            current_document=file.filename
         )
-        
+
+        # The diff is planned here so its stats can be returned; only embedding moves to an ingestion worker
+        job, stats = await create_update_job(
+            document_id, file.filename, content, chunk_size, chunk_overlap, chunk_unit, chunker,
+            claim=run_ingestion_here
+        )
+        _dispatch(job["id"])
+
         return {
-            "message": f"Document upload started. Use the /status endpoint to monitor progress.",
+            "message": f"Document update started. Use the /status endpoint to monitor progress.",
             "document_id": document_id,
-            "filename": file.filename
+            "job_id": job["id"],
+            "filename": file.filename,
+            **stats
         }
-        
+
+    except HTTPException:
+        raise
     except Exception as e:
-        processing_status["status"] = "error"
+        processing_status.update(status="error")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/ingestion/jobs/{job_id}", response_model=IngestionJobInfo)
+async def get_ingestion_job(job_id: str) -> IngestionJobInfo:
+    """Get a persisted ingestion job and its last committed batch"""
+    job = ingestion_job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingestion job not found: {job_id}")
+    return IngestionJobInfo(**job)
+
+@router.post("/ingestion/jobs/{job_id}/retry", response_model=IngestionJobInfo, dependencies=requires_weaviate)
+async def retry_ingestion_job(job_id: str) -> IngestionJobInfo:
+    """Re-queue a failed ingestion job; it continues after its last committed batch"""
+    job = ingestion_job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingestion job not found: {job_id}")
+    if job["status"] != "error":
+        raise HTTPException(status_code=409, detail=f"Only failed jobs can be retried, job is {job['status']}")
+    ingestion_job_store.update(job_id, status="queued", error=None, owner_pid=None)
+    document_catalog.set_status(job["document_id"], "processing")
+    _dispatch(job_id)
+    return IngestionJobInfo(**ingestion_job_store.get(job_id))
+
 @router.get("/documents", response_model=List[DocumentInfo])
-async def list_documents():
-    """List all document chunks in the vector store"""
+async def list_documents(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0)
+):
+    """List uploaded documents from the catalog, newest first"""
     try:
-        documents = await weaviate_client.list_documents()
+        documents, total = document_catalog.list_documents(limit=limit, offset=offset)
+        response.headers["X-Total-Count"] = str(total)
         return documents
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.delete("/documents")
-async def delete_documents():
-    """Delete all documents from the vector store"""
+@router.delete("/documents", dependencies=requires_weaviate)
+async def delete_documents(background_tasks: BackgroundTasks):
+    """Tombstone all documents and delete their chunks in the background; documents still being ingested are kept"""
+    try:
+        document_ids = document_catalog.tombstone_all()
+        background_tasks.add_task(delete_all_in_background, weaviate_client, document_ids)
+        processing = document_catalog.ids_with_status("processing")
+        return {
+            "message": "Deleting all documents in the background",
+            "document_ids": document_ids,
+            "skipped_processing": processing
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/documents/{document_id}", response_model=DocumentInfo)
+async def get_document(document_id: str) -> DocumentInfo:
+    """Get a document's catalog entry; chunk_count counts down while it is being deleted"""
+    document = document_catalog.get(document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"Document not found: {document_id}")
+    return document
+
+@router.delete("/documents/{document_id}", dependencies=requires_weaviate)
+async def delete_document(document_id: str, background_tasks: BackgroundTasks):
+    """Tombstone a document immediately and delete its chunks in background batches"""
+    document = document_catalog.get(document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"Document not found: {document_id}")
+    if document.status in ("processing", "deleting"):
+        raise HTTPException(status_code=409, detail=f"Document is {document.status}, try again later")
+    try:
+        document_catalog.set_status(document_id, "deleting")
+        background_tasks.add_task(delete_document_in_background, weaviate_client, document_id)
+        return {
+            "message": f"Deleting document in the background. Use /documents/{document_id} to monitor progress.",
+            "document_id": document_id,
+            "status": "deleting"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/documents/reconcile", dependencies=requires_weaviate)
+async def reconcile_documents():
+    """Rebuild catalog chunk counts from Weaviate's per-document aggregation"""
     try:
-        await weaviate_client.delete_all_documents()
-        return {"message": "Successfully deleted all documents"}
+        return await reconcile_catalog(weaviate_client)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/status", response_model=ProcessingStatus)
 async def get_processing_status() -> ProcessingStatus:
-    progress = (processing_status["processed_chunks"] / processing_status["total_chunks"] * 100) if processing_status["total_chunks"] > 0 else 0
+    current = processing_status.get()
+    progress = (current["processed_chunks"] / current["total_chunks"] * 100) if current["total_chunks"] > 0 else 0
     return ProcessingStatus(
-        status=processing_status["status"],
+        status=current["status"],
         progress=progress,
-        total_chunks=processing_status["total_chunks"],
-        processed_chunks=processing_status["processed_chunks"],
-        current_document=processing_status["current_document"]
+        total_chunks=current["total_chunks"],
+        processed_chunks=current["processed_chunks"],
+        current_document=current["current_document"],
+        embedding_concurrency=embedding_limiter.snapshot()
     )
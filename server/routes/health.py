@@ -1,25 +1,37 @@
 from fastapi import APIRouter
+from utils.serialization import FastJSONResponse
 from models.api_models import HealthResponse
-from core.llm import check_ollama_connection
-from db.weaviate_client import weaviate_client
+from core.health import health_prober
 
 router = APIRouter()
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
-    """Check the health of the server and its dependencies"""
-    ollama_status = await check_ollama_connection()
-
-    try:
-        await weaviate_client.check_weaviate_connection()
-        weaviate_status = True
-    except:
-        weaviate_status = False
-
-        print(f"ollama_status: {ollama_status} weaviate: {weaviate_status}")
+async def health_check(history: bool = False):
+    """Report the server's dependencies from the background prober's latest results"""
+    # Only waits right after startup, before the first probes have answered
+    await health_prober.wait_first_round()
+    dependencies = health_prober.snapshot(include_history=history)
+    ollama_status = health_prober.is_ok("ollama")
+    weaviate_status = health_prober.is_ok("weaviate")
+    checked = [dependency["checked_at"] for dependency in dependencies.values() if dependency["checked_at"]]
 
     return HealthResponse(
         status="healthy" if (ollama_status and weaviate_status) else "degraded",
         ollama_status=ollama_status,
-        weaviate_status=weaviate_status
+        weaviate_status=weaviate_status,
+        checked_at=min(checked) if checked else None,
+        dependencies=dependencies
     )
+
+@router.get("/health/live")
+async def liveness():
+    """The process is up and its event loop answers; dependencies are not checked"""
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness():
+    """Whether this worker can serve traffic: 503 until the required dependencies pass their last probe"""
+    not_ready = health_prober.not_ready()
+    if not_ready:
+        return FastJSONResponse(status_code=503, content={"status": "not_ready", "failing": not_ready})
+    return {"status": "ready"}
@@ -1,143 +1,151 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
-from models.api_models import QueryRequest, StreamingResponse
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Any, Dict, List, Optional, Tuple
+from models.api_models import QueryRequest, StreamingResponse, QueryJobStatus
 from core.llm import generate_streaming_response, get_embedding, compress_documents_with_llm
 from core.weaviate import WeaviateRetriever
+from core.query_jobs import query_jobs
 from db.weaviate_client import weaviate_client
+from db.catalog import document_catalog
 from prompts.templates import generate_rag_prompt
 from utils.streaming import StreamingJSONResponse
-from langchain_core.documents import Document
+from models.retrieval import RetrievedChunk
 import json
 
 router = APIRouter()
 
-class Reference:
-    def __init__(self, page, start_line, end_line, content, similarity_score):
-        self.page = page
-        self.start_line = start_line
-        self.end_line = end_line
-        self.content = content
-        self.similarity_score = similarity_score
-        
-    def dict(self):
-        return {
-            'page': self.page,
-            'start_line': self.start_line,
-            'end_line': self.end_line,
-            'content': self.content,
-            'similarity_score': self.similarity_score
-        }
-
-def extract_context_and_references(documents: List[Document]):
-    """Extract context and references from LangChain documents."""
+def extract_context_and_references(documents: List[RetrievedChunk]) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Extract prompt context and the serialized references payload from retrieved chunks."""
     context_chunks = []
     references = []
-    
+
     for doc in documents:
-        content = doc.page_content
-        metadata = doc.metadata
-        
-        if content:
-            context_chunks.append(str(content))
-            
-            references.append(Reference(
-                page=metadata.get("page", 0),
-                start_line=metadata.get("start_line", 0),
-                end_line=metadata.get("end_line", 0),
-                content=str(content),
-                similarity_score=metadata.get("similarity_score", 0)
-            ))
-    
+        if doc.content:
+            context_chunks.append(doc.content)
+            references.append(doc.to_reference())
+
     return context_chunks, references
 
-@router.post("/query")
+NO_RESULTS_ANSWER = "No relevant information found in the uploaded documents."
+
+async def empty_response():
+    yield {
+        "answer": NO_RESULTS_ANSWER,
+        "references": [],
+        "done": True
+    }
+
+async def prepare_query(question: str, document_id: Optional[str] = None) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+    """Retrieve and compress context for a question, returning the prompt and its references."""
+    # Initialize the Weaviate retriever
+    retriever = WeaviateRetriever(weaviate_client, k=10)  # Get more documents initially
+
+    # Documents being deleted are tombstoned and must not be searched
+    tombstoned = document_catalog.tombstoned_ids()
+    if document_id in tombstoned:
+        return None
+
+    # Get relevant documents
+    documents = await retriever.get_relevant_documents(
+        question,
+        document_id=document_id,
+        exclude_document_ids=() if document_id else tombstoned
+    )
+    if not documents:
+        return None
+
+    # Apply contextual compression to get the most relevant parts
+    compressed_documents = await compress_documents_with_llm(documents, question)
+    if not compressed_documents:
+        return None
+
+    # Extract context and references from compressed documents
+    context_chunks, references = extract_context_and_references(compressed_documents)
+
+    # Generate answer using Ollama
+    prompt = generate_rag_prompt(question, context_chunks)
+    return prompt, references
+
+async def stream_answer(prompt: str, references: List[Dict[str, Any]]):
+    """Stream the LLM answer, attaching the already-serialized references to the final chunk; errors propagate."""
+    async for chunk in generate_streaming_response(prompt):
+        done = chunk.get("done", False)
+        yield {
+            "answer": chunk.get("answer", ""),
+            "references": references if done else [],
+            "done": done
+        }
+
+async def generate_combined_response(prompt: str, references: List[Dict[str, Any]]):
+    """Like stream_answer, but a generation error ends the stream with an apology as the answer."""
+    try:
+        async for chunk in stream_answer(prompt, references):
+            yield chunk
+    except Exception as gen_error:
+        print(f"Error in generate_combined_response: {gen_error}")
+        yield {
+            "answer": f"Sorry, I encountered an error while generating the response: {str(gen_error)}",
+            "references": [],
+            "done": True
+        }
+
+async def run_query(question: str, document_id: Optional[str] = None):
+    """Full retrieval and generation pipeline as a single stream, used by background jobs.
+
+    Generation errors are raised rather than turned into answer text, so the job ends in error.
+    """
+    prepared = await prepare_query(question, document_id)
+    if prepared is None:
+        async for chunk in empty_response():
+            yield chunk
+        return
+    async for chunk in stream_answer(*prepared):
+        yield chunk
+
+@router.post("/query", dependencies=[Depends(weaviate_client.require_ready)])
 async def query_novel(query: QueryRequest):
     """Query the novel with streaming response using contextual compression"""
-    try:
-        # Initialize the Weaviate retriever
-        retriever = WeaviateRetriever(weaviate_client, k=10)  # Get more documents initially
-        
-        # Get relevant documents
-        documents = await retriever.get_relevant_documents(
-            query.question, 
-            document_id=getattr(query, 'document_id', None)
+    if query.mode not in ("stream", "job"):
+        raise HTTPException(status_code=400, detail=f"Unknown query mode: {query.mode}")
+
+    if query.mode == "job":
+        job = query_jobs.submit(
+            lambda: run_query(query.question, query.document_id),
+            query.question,
+            query.document_id
         )
-        
-        if not documents:
-            async def empty_response():
-                yield {
-                    "answer": "No relevant information found in the uploaded documents.",
-                    "references": [],
-                    "done": True
-                }
-            return StreamingJSONResponse(empty_response())
-        
-        # Apply contextual compression to get the most relevant parts
-        compressed_documents = await compress_documents_with_llm(documents, query.question)
-        
-        if not compressed_documents:
-            async def empty_response():
-                yield {
-                    "answer": "No relevant information found in the uploaded documents.",
-                    "references": [],
-                    "done": True
-                }
+        return {
+            "job_id": job.job_id,
+            "status": job.status,
+            "status_url": f"/query/jobs/{job.job_id}",
+            "stream_url": f"/query/jobs/{job.job_id}/stream"
+        }
+
+    try:
+        prepared = await prepare_query(query.question, query.document_id)
+        if prepared is None:
             return StreamingJSONResponse(empty_response())
-        
-        # Extract context and references from compressed documents
-        context_chunks, references = extract_context_and_references(compressed_documents)
-        
-        # Generate answer using Ollama
-        prompt = generate_rag_prompt(query.question, context_chunks)
-        
-        async def generate_combined_response():
-            try:
-                async for chunk in generate_streaming_response(prompt):
-                    if chunk.get("done", False):
-                        try:
-                            references_list = []
-                            for ref in references:
-                                if hasattr(ref, 'dict'):
-                                    references_list.append(ref.dict())
-                                elif isinstance(ref, dict):
-                                    references_list.append(ref)
-                                else:
-                                    references_list.append({
-                                        'page': getattr(ref, 'page', 0),
-                                        'start_line': getattr(ref, 'start_line', 0),
-                                        'end_line': getattr(ref, 'end_line', 0),
-                                        'content': getattr(ref, 'content', ''),
-                                        'similarity_score': getattr(ref, 'similarity_score', 0)
-                                    })
-                            
-                            yield {
-                                "answer": chunk.get("answer", ""),
-                                "references": references_list,
-                                "done": True
-                            }
-                        except Exception as ref_error:
-                            print(f"Error processing references: {ref_error}")
-                            yield {
-                                "answer": chunk.get("answer", ""),
-                                "references": [],
-                                "done": True
-                            }
-                    else:
-                        yield {
-                            "answer": chunk.get("answer", ""),
-                            "references": [],
-                            "done": False
-                        }
-            except Exception as gen_error:
-                print(f"Error in generate_combined_response: {gen_error}")
-                yield {
-                    "answer": f"Sorry, I encountered an error while generating the response: {str(gen_error)}",
-                    "references": [],
-                    "done": True
-                }
-        
-        return StreamingJSONResponse(generate_combined_response())
+
+        prompt, references = prepared
+        return StreamingJSONResponse(generate_combined_response(prompt, references))
         
     except Exception as e:
         print(f"Error in query_novel: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/query/jobs/{job_id}", response_model=QueryJobStatus)
+async def get_query_job(job_id: str) -> QueryJobStatus:
+    """Poll a background query job for its current answer"""
+    job = query_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Query job not found: {job_id}")
+    return QueryJobStatus(**job.snapshot())
+
+@router.get("/query/jobs/{job_id}/stream")
+async def stream_query_job(job_id: str, from_offset: int = 0):
+    """Stream a background query job, resuming after `from_offset` answer characters"""
+    job = query_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Query job not found: {job_id}")
+    if from_offset < 0:
+        raise HTTPException(status_code=400, detail="from_offset must be non-negative")
+    return StreamingJSONResponse(job.stream(from_offset))
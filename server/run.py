@@ -1,4 +1,10 @@
 #!/usr/bin/env python3
+"""Start the API server.
+
+    python run.py                  # development: one process, reloads on code changes
+    python run.py --workers 4      # production: four worker processes, no reload
+"""
+import argparse
 import os
 import sys
 
@@ -6,8 +12,35 @@ import sys
 server_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, server_dir)
 
-from main import app
 import uvicorn
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+# Worker processes; they share job state, the catalog and processing status through the local SQLite state
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
+    parser = argparse.ArgumentParser(description="Start the RAG chatbot API server")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS,
+                        help="worker processes; more than one turns off reload")
+    parser.add_argument("--no-reload", dest="reload", action="store_false",
+                        help="do not restart on code changes (implied by --workers > 1)")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    # An import string lets uvicorn import the app in each worker process or reloaded process
+    uvicorn.run(
+        "main:app",
+        app_dir=server_dir,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=args.reload and args.workers == 1
+    )
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# Import server modules as run.py does, with local state in a throwaway directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("RAG_DATA_DIR", tempfile.mkdtemp(prefix="rag-test-"))
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from core import dedup
+from db.weaviate_client import weaviate_client
+
+STORED_UUID = "00000000-0000-0000-0000-000000000001"
+
+
+class FakeCollection:
+    """One stored chunk; writes are slow so unsynchronized read-modify-writes would interleave."""
+
+    def __init__(self, document_ids):
+        self.properties = {"document_id": document_ids[0], "document_ids": list(document_ids)}
+        self._guard = threading.Lock()
+        self.query = SimpleNamespace(fetch_objects=self.fetch_objects)
+        self.data = SimpleNamespace(update=self.update)
+
+    def fetch_objects(self, filters=None, limit=None, return_properties=None):
+        with self._guard:
+            properties = {key: list(value) if isinstance(value, list) else value for key, value in self.properties.items()}
+        return SimpleNamespace(objects=[SimpleNamespace(uuid=STORED_UUID, properties=properties)])
+
+    def update(self, uuid, properties):
+        time.sleep(0.05)
+        with self._guard:
+            self.properties.update(properties)
+
+
+def test_concurrent_sharing_keeps_every_reference(monkeypatch):
+    collection = FakeCollection(["owner"])
+    client = SimpleNamespace(collections=SimpleNamespace(get=lambda name: collection))
+    monkeypatch.setattr(weaviate_client, "_client", client)
+
+    async def find_chunk_refs(content_hashes=(), uuids=()):
+        # Both jobs look the chunk up before either has shared it
+        return [{"uuid": STORED_UUID, "content_hash": "h", "document_id": "owner", "document_ids": ["owner"]}]
+    monkeypatch.setattr(weaviate_client, "find_chunk_refs", find_chunk_refs)
+
+    def planned(document_id):
+        return [{"uuid": f"{document_id}-0", "content_hash": "h", "text": "shared text"}]
+
+    async def share_concurrently():
+        return await asyncio.gather(
+            dedup.split_duplicates(planned("first"), "first"),
+            dedup.split_duplicates(planned("second"), "second")
+        )
+
+    results = asyncio.run(share_concurrently())
+
+    for to_embed, shared, _ in results:
+        assert to_embed == []
+        assert shared == [STORED_UUID]
+    assert sorted(collection.properties["document_ids"]) == ["first", "owner", "second"]
+
+
+def test_chunk_deleted_before_sharing_is_embedded(monkeypatch):
+    empty = SimpleNamespace(
+        query=SimpleNamespace(fetch_objects=lambda **kwargs: SimpleNamespace(objects=[])),
+        data=SimpleNamespace(update=None)
+    )
+    monkeypatch.setattr(weaviate_client, "_client", SimpleNamespace(collections=SimpleNamespace(get=lambda name: empty)))
+
+    async def find_chunk_refs(content_hashes=(), uuids=()):
+        return [{"uuid": STORED_UUID, "content_hash": "h", "document_id": "owner", "document_ids": ["owner"]}]
+    monkeypatch.setattr(weaviate_client, "find_chunk_refs", find_chunk_refs)
+
+    batch = [
+        {"uuid": "doc-0", "content_hash": "h", "text": "shared text"},
+        {"uuid": "doc-1", "content_hash": "h", "text": "shared text"}
+    ]
+    to_embed, shared, _ = asyncio.run(dedup.split_duplicates(batch, "doc"))
+
+    assert [chunk["uuid"] for chunk in to_embed] == ["doc-0"]
+    assert shared == []
@@ -0,0 +1,55 @@
+import asyncio
+from core import ingestion
+from core.planning import plan_chunks
+from utils.hashing import content_hash
+
+TEXT = "\n\n".join(f"Paragraph {i}: " + "the harbour was quiet and the gulls circled. " * 6 for i in range(10))
+
+
+def stored_chunks(plan, document_id, content_hash_of):
+    """Chunks as list_document_chunks returns them for a stored edition of plan."""
+    return [
+        {
+            "uuid": chunk["uuid"],
+            "content_hash": content_hash_of(chunk),
+            "document_id": document_id,
+            "chunk_index": chunk["chunk_index"],
+            "page": chunk["page"],
+            "start_line": chunk["start_line"],
+            "end_line": chunk["end_line"],
+            "filename": "novel.txt"
+        }
+        for chunk in plan["chunks"]
+    ]
+
+
+def plan_update(monkeypatch, existing, text=TEXT):
+    async def list_document_chunks(document_id):
+        return existing
+    monkeypatch.setattr(ingestion.weaviate_client, "list_document_chunks", list_document_chunks)
+    return asyncio.run(ingestion.plan_update("doc", "novel.txt", text, 300, 30))
+
+
+def test_reupload_with_changed_chunk_hashes_keeps_new_chunks(monkeypatch):
+    # Same raw text, but stored under other content hashes, as after a preprocessing change
+    original = plan_chunks(TEXT, 300, 30)
+    existing = stored_chunks(original, "doc", lambda chunk: content_hash("old " + chunk["text"]))
+
+    plan = plan_update(monkeypatch, existing)
+
+    written = {chunk["uuid"] for chunk in plan["chunks"]}
+    assert len(written) == len(original["chunks"])
+    assert not written & set(plan["delete_uuids"])
+    assert not written & {stored["uuid"] for stored in existing}
+    assert set(plan["delete_uuids"]) == {stored["uuid"] for stored in existing}
+
+
+def test_unchanged_chunks_are_kept(monkeypatch):
+    original = plan_chunks(TEXT, 300, 30)
+    existing = stored_chunks(original, "doc", lambda chunk: chunk["content_hash"])
+
+    plan = plan_update(monkeypatch, existing)
+
+    assert plan["chunks"] == []
+    assert plan["delete_uuids"] == []
+    assert plan["stats"]["unchanged_chunks"] == len(original["chunks"])
@@ -0,0 +1,46 @@
+import hashlib
+import uuid
+from typing import Any, Dict, List
+
+# Fixed namespace so the same input always maps to the same UUID across runs and hosts
+RAG_NAMESPACE = uuid.UUID("6f1f3c2e-8d4b-5a7e-9c21-4b0d7e5a9f13")
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 hex digest of text, used to identify document and chunk content."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunker_config_key(chunk_size: int, chunk_overlap: int, chunk_unit: str = "chars") -> str:
+    """Stable description of the chunker settings that shape a document's chunks."""
+    if chunk_unit == "tokens":
+        # Token counts depend on the tokenizer, so it is part of the config
+        from utils.tokenization import get_token_counter
+        return f"tokens:{chunk_size}:{chunk_overlap}:{get_token_counter().name}"
+    return f"chars:{chunk_size}:{chunk_overlap}"
+
+
+def document_uuid(document_hash: str, chunker_config: str) -> str:
+    """Deterministic document id, so re-uploading the same text with the same settings is an upsert."""
+    return str(uuid.uuid5(RAG_NAMESPACE, f"document:{document_hash}:{chunker_config}"))
+
+
+def chunk_uuid(document_hash: str, chunk_index: int, chunker_config: str) -> str:
+    """Deterministic Weaviate object id for one chunk of a document."""
+    return str(uuid.uuid5(RAG_NAMESPACE, f"chunk:{document_hash}:{chunker_config}:{chunk_index}"))
+
+
+def update_chunk_uuid(document_id: str, content_hash: str, chunk_index: int) -> str:
+    """Object id for a chunk an update adds to an existing document.
+
+    Keyed on the chunk's own text, so it cannot collide with a stored chunk of
+    different text, even if the new edition's text hashes like the old one.
+    """
+    return str(uuid.uuid5(RAG_NAMESPACE, f"update-chunk:{document_id}:{content_hash}:{chunk_index}"))
+
+
+def assign_chunk_ids(chunks: List[Dict[str, Any]], document_hash: str, chunker_config: str) -> List[Dict[str, Any]]:
+    """Set each chunk's 'uuid' from the document hash, its chunk_index and the chunker config."""
+    for chunk in chunks:
+        chunk['uuid'] = chunk_uuid(document_hash, chunk['chunk_index'], chunker_config)
+    return chunks
@@ -0,0 +1,69 @@
+import json
+import os
+from typing import Any, Callable, Dict
+from fastapi.responses import JSONResponse
+from dotenv import load_dotenv
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard library
+    orjson = None
+
+# Load environment variables from .env file
+load_dotenv()
+
+# "auto" picks orjson when installed, "json" forces the standard library
+JSON_SERIALIZER = os.getenv("JSON_SERIALIZER", "auto").lower()
+
+
+class JSONSerializer:
+    """Encodes payloads straight to bytes, optionally newline-framed for NDJSON streams."""
+
+    def __init__(self, name: str, dumps: Callable[[Any], bytes], dumps_line: Callable[[Any], bytes]):
+        self.name = name
+        self.dumps = dumps
+        self.dumps_line = dumps_line
+
+
+def _orjson_serializer() -> JSONSerializer:
+    options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    return JSONSerializer(
+        "orjson",
+        dumps=lambda obj: orjson.dumps(obj, option=options),
+        dumps_line=lambda obj: orjson.dumps(obj, option=options | orjson.OPT_APPEND_NEWLINE)
+    )
+
+
+def _stdlib_serializer() -> JSONSerializer:
+    encode = json.JSONEncoder(separators=(",", ":")).encode
+    return JSONSerializer(
+        "json",
+        dumps=lambda obj: encode(obj).encode("utf-8"),
+        dumps_line=lambda obj: (encode(obj) + "\n").encode("utf-8")
+    )
+
+
+SERIALIZERS: Dict[str, Callable[[], JSONSerializer]] = {
+    "json": _stdlib_serializer,
+}
+if orjson is not None:
+    SERIALIZERS["orjson"] = _orjson_serializer
+
+
+def get_serializer(name: str = JSON_SERIALIZER) -> JSONSerializer:
+    """Return the named serializer, or the fastest installed one for "auto"."""
+    if name == "auto":
+        name = "orjson" if "orjson" in SERIALIZERS else "json"
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown or unavailable JSON serializer: {name}")
+    return SERIALIZERS[name]()
+
+
+serializer = get_serializer()
+
+
+class FastJSONResponse(JSONResponse):
+    """Default API response class rendering through the configured serializer."""
+
+    def render(self, content: Any) -> bytes:
+        return serializer.dumps(content)
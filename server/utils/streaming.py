@@ -1,7 +1,6 @@
-from fastapi import Response
 from fastapi.responses import StreamingResponse
-import json
 from typing import Any, Dict, AsyncGenerator
+from utils.serialization import serializer
 
 class StreamingJSONResponse(StreamingResponse):
     media_type = "application/json"
@@ -13,12 +12,14 @@ class StreamingJSONResponse(StreamingResponse):
         headers: Dict[str, str] = None,
     ):
         async def generate():
+            # Newline-framed bytes straight from the serializer, no intermediate str
+            dumps_line = serializer.dumps_line
             async for chunk in content:
-                yield (json.dumps(chunk) + "\n").encode("utf-8")
+                yield dumps_line(chunk)
         
         super().__init__(
             content=generate(),
             status_code=status_code,
             headers=headers,
             media_type=self.media_type
-        )
\ No newline at end of file
+        )
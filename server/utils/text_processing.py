@@ -1,28 +1,31 @@
 import re
-from typing import List, Dict, Any, Optional
-import nltk
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.documents import Document
+from bisect import bisect_right
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
 import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+# "chars" measures chunk_size and chunk_overlap in characters, "tokens" in embedding-model tokens
+CHUNK_UNITS = ("chars", "tokens")
+CHUNK_UNIT = os.getenv("CHUNK_UNIT", "chars")
+# "recursive" splits on separators by size, "semantic" at drops in sentence-embedding similarity
+CHUNKERS = ("recursive", "semantic")
+CHUNKER = os.getenv("CHUNKER", "recursive")
 
 class LangChainChunker:
     def __init__(
         self,
         chunk_size: int = 1000,  # Larger chunks for better context
         chunk_overlap: int = 200,  # More overlap for continuity
-        separators: Optional[List[str]] = None
+        separators: Optional[List[str]] = None,
+        chunk_unit: str = "chars"
     ):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.chunk_unit = chunk_unit
         
         # Default separators optimized for novels/documents
         if separators is None:
@@ -38,33 +41,44 @@ class LangChainChunker:
                 ""           # Character-level fallback
             ]
         
+        # Imported on first use; LangChain takes longer to import than the rest of the server
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
             separators=separators,
-            length_function=len,
-            is_separator_regex=False
+            length_function=chunk_length_function(chunk_unit, chunk_size),
+            is_separator_regex=False,
+            add_start_index=True  # Character offset of each chunk, for page/line lookup
         )
 
-    def create_chunks(self, text: str, metadata: Dict[str, Any] = None) -> List[Dict[str, Any]]:
-        """Create chunks using LangChain's RecursiveCharacterTextSplitter."""
+    def create_chunks(
+        self,
+        text: str,
+        metadata: Dict[str, Any] = None,
+        positions: Optional["TextPositions"] = None
+    ) -> List[Dict[str, Any]]:
+        """Create chunks using LangChain's RecursiveCharacterTextSplitter.
+
+        Page and line numbers come from each chunk's character offset in text.
+        """
         if metadata is None:
             metadata = {}
-        
-        # Create a LangChain Document
-        doc = Document(page_content=text, metadata=metadata)
-        
-        # Split the document
-        chunks = self.text_splitter.split_documents([doc])
-        
+        if positions is None:
+            positions = TextPositions(text)
+
+        # Split the text into LangChain Documents
+        chunks = self.text_splitter.create_documents([text], [metadata])
+
         # Convert to our expected format
         result_chunks = []
         for i, chunk in enumerate(chunks):
-            # Calculate approximate page and line numbers
-            page = (i // 5) + 1  # Assume ~5 chunks per page
-            start_line = i * 10 + 1  # Approximate line calculation
-            end_line = start_line + chunk.page_content.count('\n') + 10
-            
+            start = chunk.metadata.get('start_index', -1)
+            if start < 0:
+                start = 0  # The splitter could not place the chunk; should not happen for unmodified text
+            page, start_line, end_line = positions.locate(start, start + len(chunk.page_content))
+
             result_chunks.append({
                 'text': chunk.page_content,
                 'page': page,
@@ -73,39 +87,179 @@ class LangChainChunker:
                 'chunk_index': i,
                 'metadata': chunk.metadata
             })
-        
+
         return result_chunks
 
+
+class TextPositions:
+    """Maps character offsets to 1-based page numbers and page-relative line numbers.
+
+    Pages are separated by form feeds. Page and line start offsets are computed
+    once per document, so each lookup is a binary search. Lines are counted from
+    the start of the page a span begins on; a span running onto the next page
+    keeps counting from there.
+    """
+
+    def __init__(self, text: str):
+        self.page_starts = [0] + [m.end() for m in re.finditer(r'\f', text)]
+        self.line_starts = [0] + [m.end() for m in re.finditer(r'[\n\f]', text)]
+        # Index in line_starts of each page's first line
+        self.page_first_lines = [bisect_right(self.line_starts, start) - 1 for start in self.page_starts]
+
+    def locate(self, start: int, end: int) -> Tuple[int, int, int]:
+        """Return (page, start_line, end_line) for the span text[start:end]."""
+        page_index = bisect_right(self.page_starts, start) - 1
+        first_line = self.page_first_lines[page_index]
+        start_line = bisect_right(self.line_starts, start) - 1
+        end_line = bisect_right(self.line_starts, max(start, end - 1)) - 1
+        return page_index + 1, start_line - first_line + 1, end_line - first_line + 1
+
+
+# Typographic ligatures and invisible characters common in PDF text
+_CHARACTER_REPLACEMENTS = {
+    '\ufb00': 'ff',
+    '\ufb01': 'fi',
+    '\ufb02': 'fl',
+    '\ufb03': 'ffi',
+    '\ufb04': 'ffl',
+    '\ufb05': 'st',
+    '\ufb06': 'st',
+    '\u00ad': '',  # soft hyphen
+    '\u200b': '',  # zero-width space
+    '\ufeff': ''  # byte order mark
+}
+
+# Whitespace that str.isspace() and \s match, other than the plain space, \n, \r and \f
+_HORIZONTAL_SPACES = (
+    '\t\x0b\x1c\x1d\x1e\x1f\x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006'
+    '\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000'
+)
+# A word hyphenated across a line break, when the next line continues it in lower case.
+# Starting on the literal hyphen lets the scanner skip to candidates instead of trying every position
+_HYPHENATED = re.compile(r'-(?<=\w-)\n(?P<rest>[a-z\u00df-\u00ff]\w*[^\s\w]*) ?')
+
+_DIGITS = re.compile(r'\d+')
+PAGE_EDGE_LINES = 2  # Lines at the top and bottom of each page checked for headers and footers
+
+
+def _edge_lines(lines: List[str]) -> List[int]:
+    # Scan in from both ends only as far as the edge lines, not across the whole page
+    head = []
+    for i, line in enumerate(lines):
+        if line:
+            head.append(i)
+            if len(head) == PAGE_EDGE_LINES:
+                break
+    tail = []
+    for i in range(len(lines) - 1, -1, -1):
+        if lines[i]:
+            tail.append(i)
+            if len(tail) == PAGE_EDGE_LINES:
+                break
+    return sorted(set(head + tail))
+
+
+def _page_line_key(line: str) -> str:
+    # Page numbers differ from page to page; compare everything else
+    return _DIGITS.sub('#', line).lower()
+
+
+def strip_page_furniture(text: str, min_pages: int = 3, min_share: float = 0.5) -> str:
+    """Blank out header and footer lines repeated on at least min_share of the pages.
+
+    Only lines near the top and bottom of each form-feed separated page are
+    considered. The lines are emptied rather than removed, to keep line numbers.
+    """
+    if text.count('\f') + 1 < min_pages:
+        return text
+    pages = [page.split('\n') for page in text.split('\f')]
+
+    edges = [[(i, _page_line_key(lines[i])) for i in _edge_lines(lines)] for lines in pages]
+    counts = Counter()
+    for page_edges in edges:
+        counts.update({key for _, key in page_edges})
+    threshold = max(min_pages, len(pages) * min_share)
+    repeated = {key for key, count in counts.items() if count >= threshold}
+    if not repeated:
+        return text
+
+    for lines, page_edges in zip(pages, edges):
+        for i, key in page_edges:
+            if key in repeated:
+                lines[i] = ''
+    return '\f'.join('\n'.join(lines) for lines in pages)
+
+
 def preprocess_text(text: str) -> str:
-    """Clean and normalize text before chunking."""
-    # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Normalize line endings
-    text = text.replace('\r\n', '\n').replace('\r', '\n')
-    
-    # Fix common formatting issues
-    text = re.sub(r'([.!?])\s*\n\s*', r'\1\n\n', text)  # Add proper paragraph breaks
-    text = re.sub(r'\n{3,}', '\n\n', text)  # Normalize multiple line breaks
-    
-    return text.strip()
+    """Clean and normalize text before chunking in linear time.
+
+    Ligatures are expanded, line endings normalized, horizontal whitespace
+    collapsed (no-break spaces included) and hyphenated line breaks rejoined,
+    then repeated page headers and footers are blanked. Each step is a
+    str.replace or a regex anchored on a literal, skipped when its characters
+    do not occur. Line breaks and form feeds (page breaks) are kept one for
+    one, so offsets in the result map to the same pages and lines as the
+    extracted text, and paragraph breaks survive for the splitter.
+    """
+    for char, replacement in _CHARACTER_REPLACEMENTS.items():
+        if char in text:
+            text = text.replace(char, replacement)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    for char in _HORIZONTAL_SPACES:
+        if char in text:
+            text = text.replace(char, ' ')
+    # Each pass halves the runs of spaces
+    while '  ' in text:
+        text = text.replace('  ', ' ')
+    # Runs are single spaces now, so one replace per side trims every line
+    text = text.replace(' \n', '\n').replace('\n ', '\n').replace(' \f', '\f').replace('\f ', '\f')
+    if '-\n' in text:
+        # Rejoin the word on the first line and keep the line break after it, so no line disappears
+        text = _HYPHENATED.sub(r'\g<rest>\n', text)
+    text = strip_page_furniture(text.strip(' '))
+
+    # Leading line breaks are kept so line numbers stay true
+    return text.rstrip()
+
+def chunk_length_function(chunk_unit: str, chunk_size: Optional[int] = None):
+    """How the splitter measures a piece of text for the given chunk unit.
+
+    With a chunk_size, token counts skip exact tokenization for text far longer than a chunk.
+    """
+    if chunk_unit == "tokens":
+        from utils.tokenization import get_token_counter, token_length_function
+        if chunk_size is None:
+            return get_token_counter().count
+        return token_length_function(chunk_size)
+    return len
+
 
 def chunk_document(
     text: str,
     chunk_size: int = 1000,  # Increased default size
-    chunk_overlap: int = 200  # Increased overlap
+    chunk_overlap: int = 200,  # Increased overlap
+    chunk_unit: str = "chars"
 ) -> List[Dict[str, Any]]:
-    """Process and chunk a document using LangChain's advanced text splitting."""
+    """Process and chunk a document using LangChain's advanced text splitting.
+
+    Form feeds in text mark page breaks, as written by PDF extraction.
+    """
     # Preprocess the text
     processed_text = preprocess_text(text)
-    
+
+    # Record page and line offsets, then turn page breaks into plain line breaks (same length)
+    positions = TextPositions(processed_text)
+    processed_text = processed_text.replace('\f', '\n')
+
     # Create chunker instance
     chunker = LangChainChunker(
         chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap
+        chunk_overlap=chunk_overlap,
+        chunk_unit=chunk_unit
     )
-    
+
     # Generate chunks
-    chunks = chunker.create_chunks(processed_text)
-    
+    chunks = chunker.create_chunks(processed_text, positions=positions)
+
     return chunks
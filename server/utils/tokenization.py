@@ -0,0 +1,145 @@
+import math
+import os
+import unicodedata
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+from dotenv import load_dotenv
+from utils.hashing import content_hash
+
+# Load environment variables from .env file
+load_dotenv()
+
+# vocab.txt of the embedding model's WordPiece tokenizer (nomic-embed-text uses bert-base-uncased's)
+TOKENIZER_VOCAB_PATH = os.getenv("TOKENIZER_VOCAB_PATH", "")
+# Used to estimate token counts when no vocabulary is configured
+CHARS_PER_TOKEN = float(os.getenv("CHARS_PER_TOKEN", "4.0"))
+# With a vocabulary, text whose character estimate exceeds the chunk size by this factor is not tokenized
+TOKEN_FAST_PATH_MARGIN = float(os.getenv("TOKEN_FAST_PATH_MARGIN", "2.0"))
+# Context window of the embedding model; longer inputs are truncated by Ollama
+EMBED_CONTEXT_TOKENS = int(os.getenv("EMBED_CONTEXT_TOKENS", "8192"))
+
+
+def _is_punctuation(char: str) -> bool:
+    code = ord(char)
+    # ASCII symbols count as punctuation, as in BERT's basic tokenizer
+    if 33 <= code <= 47 or 58 <= code <= 64 or 91 <= code <= 96 or 123 <= code <= 126:
+        return True
+    return unicodedata.category(char).startswith("P")
+
+
+class WordPieceCounter:
+    """Counts WordPiece tokens the way an uncased BERT tokenizer splits text, without producing ids.
+
+    Words are lower-cased, stripped of accents and split on whitespace and
+    punctuation, then matched greedily against the vocabulary. Token counts
+    are cached per word, so repeated words cost a dictionary lookup.
+    """
+
+    def __init__(
+        self,
+        vocab: Dict[str, int],
+        max_chars_per_word: int = 100,
+        cache_size: int = 200000,
+        vocab_hash: Optional[str] = None
+    ):
+        self.vocab = vocab
+        self.max_chars_per_word = max_chars_per_word
+        if vocab_hash is None:
+            # Hash the vocabulary as its vocab.txt would read, one token per line in id order
+            vocab_hash = content_hash("".join(f"{token}\n" for token in sorted(vocab, key=vocab.get)))
+        # Part of the chunker config key: two vocabularies of the same size must not share chunk ids
+        self.name = f"wordpiece-{vocab_hash[:16]}"
+        self._word_tokens = lru_cache(maxsize=cache_size)(self._count_word)
+
+    @classmethod
+    def from_file(cls, path: str) -> "WordPieceCounter":
+        with open(path, encoding="utf-8") as f:
+            contents = f.read()
+        lines = contents.split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        return cls({line: index for index, line in enumerate(lines)}, vocab_hash=content_hash(contents))
+
+    def _count_word(self, word: str) -> int:
+        """WordPiece tokens in one whitespace-separated word, punctuation included."""
+        word = unicodedata.normalize("NFD", word.lower())
+        word = "".join(char for char in word if unicodedata.category(char) != "Mn")
+        count = 0
+        piece = []
+        for char in word:
+            if _is_punctuation(char):
+                count += self._count_piece("".join(piece)) + 1
+                piece = []
+            else:
+                piece.append(char)
+        return count + self._count_piece("".join(piece))
+
+    def _count_piece(self, piece: str) -> int:
+        if not piece:
+            return 0
+        if len(piece) > self.max_chars_per_word:
+            return 1  # [UNK]
+        count = 0
+        start = 0
+        while start < len(piece):
+            end = len(piece)
+            prefix = "##" if start else ""
+            while end > start and prefix + piece[start:end] not in self.vocab:
+                end -= 1
+            if end == start:
+                return 1  # No match: the whole word becomes [UNK]
+            count += 1
+            start = end
+        return count
+
+    def count(self, text: str) -> int:
+        return sum(self._word_tokens(word) for word in text.split())
+
+
+class RatioTokenCounter:
+    """Estimates tokens as characters divided by an average characters-per-token ratio."""
+
+    def __init__(self, chars_per_token: float = CHARS_PER_TOKEN):
+        self.chars_per_token = chars_per_token
+        self.name = f"ratio{chars_per_token:g}"
+
+    def count(self, text: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token)
+
+
+_counter = None
+
+
+def get_token_counter():
+    """The configured token counter: WordPiece when TOKENIZER_VOCAB_PATH is set, else the ratio estimate."""
+    global _counter
+    if _counter is None:
+        if TOKENIZER_VOCAB_PATH:
+            _counter = WordPieceCounter.from_file(TOKENIZER_VOCAB_PATH)
+        else:
+            _counter = RatioTokenCounter()
+    return _counter
+
+
+def token_length_function(limit: int) -> Callable[[str], int]:
+    """Token counts for a splitter that targets chunks of at most limit tokens.
+
+    Text whose character-ratio estimate is more than TOKEN_FAST_PATH_MARGIN
+    times the limit returns the estimate without being tokenized: the splitter
+    only learns that it does not fit and splits it further. Text that may fit
+    is counted exactly, because the splitter adds up the counts of the pieces
+    it merges into a chunk.
+    """
+    counter = get_token_counter()
+    if isinstance(counter, RatioTokenCounter):
+        return counter.count
+    far_over = limit * TOKEN_FAST_PATH_MARGIN
+
+    def length(text: str) -> int:
+        estimate = len(text) / CHARS_PER_TOKEN
+        if estimate > far_over:
+            return math.ceil(estimate)
+        return counter.count(text)
+
+    return length
+
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Ingestion worker: plans, embeds and stores uploads queued by the API.
+
+Start the API with INGEST_MODE=external so /upload only spools the file and
+records a queued job. This process claims queued jobs from the shared job
+store, keeping PDF extraction, chunking and embedding out of the API's event
+loop. Claims are atomic, so several workers can run on one host. Jobs of a
+worker that stopped are picked up again by the next poll.
+
+    python worker.py [--concurrency 4] [--poll-interval 1]
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+
+# Add the server directory to the Python path
+server_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, server_dir)
+
+
+async def work(args):
+    from core.bulk_ingestion import resume_bulk_jobs
+    from core.ingestion import claim_jobs
+    from core.ingestion_pool import ingestion_pool
+    from db.weaviate_client import weaviate_client
+
+    ingestion_pool.workers = args.concurrency
+    await weaviate_client.connect_with_retry()
+    print(f"Ingestion worker {os.getpid()} started, running up to {args.concurrency} jobs at once")
+    bulk_planning = None
+    try:
+        while True:
+            # Claim only what the pool can start now, so other workers get the rest
+            free = ingestion_pool.workers - ingestion_pool.active - ingestion_pool.queued
+            if free > 0:
+                for job in claim_jobs(free):
+                    print(f"Claimed ingestion job {job['id']} for {job['filename']}")
+            if bulk_planning is None or bulk_planning.done():
+                bulk_planning = asyncio.create_task(resume_bulk_jobs())
+            await asyncio.sleep(args.poll_interval)
+    finally:
+        if bulk_planning is not None:
+            bulk_planning.cancel()
+        # Interrupted jobs keep their checkpoint and are claimed again once this process has exited
+        await ingestion_pool.shutdown()
+        weaviate_client.close()
+
+
+async def run(args):
+    task = asyncio.current_task()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    try:
+        await work(args)
+    except asyncio.CancelledError:
+        print("Ingestion worker stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued ingestion jobs outside the API process")
+    parser.add_argument("--concurrency", type=int, default=None, help="ingestion jobs at once (default INGEST_CONCURRENCY)")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between checks for queued jobs")
+    args = parser.parse_args()
+    if args.concurrency is None:
+        from core.ingestion_pool import INGEST_CONCURRENCY
+        args.concurrency = INGEST_CONCURRENCY
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("Ingestion worker stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())